@@ -15,6 +15,21 @@ os.makedirs(IMAGES_DIR, exist_ok=True)
 # Cấu hình Bot
 TIMEOUT = 60000  # 60 giây
 HEADLESS = True # True = Chạy ngầm, False = Hiện trình duyệt
+# Flag Chromium tắt các subsystem không cần khi cào headless (GPU, extension, sync, dịch...)
+# → khởi động nhanh hơn, tốn ít RAM hơn mỗi browser. Không dùng --no-sandbox.
+BROWSER_LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-features=Translate",
+    "--metrics-recording-only",
+    "--mute-audio",
+]
 
 # ========== CẤU HÌNH TỐC ĐỘ ==========
 # ⚠️ Lưu ý: Giảm delays có thể tăng tốc nhưng cũng tăng rủi ro bị ban IP
@@ -23,11 +38,18 @@ HEADLESS = True # True = Chạy ngầm, False = Hiện trình duyệt
 # Delays - Giảm để tăng tốc (cẩn thận với rate limiting)
 DELAY_BETWEEN_CHAPTERS = 2 # Giây - Delay giữa các chương (có thể giảm xuống 0.5-1)
 DELAY_BETWEEN_REQUESTS = 5 # Giây - Delay giữa các request để tránh ban IP (có thể giảm xuống 1-2)
-DELAY_THREAD_START = 0.5 # Giây - Delay để stagger các thread khi bắt đầu (có thể giảm xuống 0.1)
 
 # Parallel Processing - Tăng để crawl nhanh hơn (tốn nhiều RAM/CPU hơn)
 MAX_WORKERS = 3  # Số thread để cào chapters song song (có thể tăng lên 6-10 nếu CPU/RAM cho phép)
 MAX_FICTION_WORKERS = 2  # Số fiction crawl song song cùng lúc (có thể tăng lên 3-5)
+MAX_TOC_WORKERS = 2  # Số browser lấy các trang danh sách chapters song song (1 = tuần tự)
+MAX_COMMENT_WORKERS = 2  # Số browser lấy các trang comments song song ở luồng cào tuần tự (1 = tuần tự)
+BLOCK_HEAVY_RESOURCES = True  # Chặn tải ảnh/font/media trong browser khi cào (chỉ cần text)
+FICTION_WORKER_MODE = "thread"  # "thread": dùng thread như cũ, "process": mỗi fiction chạy trong process riêng (spawn)
+CHAPTER_WORKER_MODE = "thread"  # "thread": mỗi thread 1 browser; "async": 1 browser + asyncio mở nhiều chương cùng lúc (cần lxml)
+PRETTY_JSON = True  # Ghi file JSON backup có indent (dễ đọc); False = JSON gọn, ghi nhanh hơn và file nhỏ hơn
+VERBOSE = True  # In log chi tiết từng trang/chương; False = chỉ in log tổng kết (giảm I/O stdout giữa các thread)
+ASYNC_PRINT = False  # True = in log qua 1 thread riêng (worker không chờ nhau ở stdout)
 
 # ========== CẤU HÌNH TỐI ƯU (Uncomment để dùng) ==========
 # DELAY_BETWEEN_CHAPTERS = 0.5  # Tăng tốc 4x
@@ -44,6 +66,9 @@ CLUSTER_URL = "royalroad.2aq2mp6.mongodb.net"
 MONGODB_DB_NAME = "RoyalRoadData"
 MONGODB_COLLECTION_STORIES = "stories"
 
+# Số giây tối đa user/comment/review nằm chờ trong buffer bulk_write (None = chỉ flush khi đủ batch / cuối mỗi story)
+MONGO_FLUSH_INTERVAL = None
+
 # Connection string đầy đủ với các options chuẩn
 # Dùng password trực tiếp, KHÔNG encode
 MONGODB_URI = (
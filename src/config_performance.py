@@ -21,15 +21,37 @@ os.makedirs(IMAGES_DIR, exist_ok=True)
 # Cấu hình Bot - TỐI ƯU TỐC ĐỘ
 TIMEOUT = 30000  # 30 giây (giảm từ 60s)
 HEADLESS = True  # Luôn chạy ngầm để nhanh hơn
+# Flag Chromium tắt các subsystem không cần khi cào headless (GPU, extension, sync, dịch...)
+# → khởi động nhanh hơn, tốn ít RAM hơn mỗi browser. Không dùng --no-sandbox.
+BROWSER_LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-features=Translate",
+    "--metrics-recording-only",
+    "--mute-audio",
+]
 
 # Delays - GIẢM ĐỂ TĂNG TỐC (cẩn thận với rate limiting)
 DELAY_BETWEEN_CHAPTERS = 0.5  # Giảm từ 2s → 0.5s
 DELAY_BETWEEN_REQUESTS = 1  # Giảm từ 5s → 1s (có thể giảm thêm nếu không bị ban)
-DELAY_THREAD_START = 0.1  # Giảm từ 0.5s → 0.1s
 
 # Parallel Processing - TĂNG SỐ WORKERS
 MAX_WORKERS = 8  # Tăng từ 3 → 8 (hoặc cao hơn nếu CPU/RAM cho phép)
 MAX_FICTION_WORKERS = 3  # Số fiction crawl song song cùng lúc (có thể tăng lên 4-5)
+MAX_TOC_WORKERS = 4  # Số browser lấy các trang danh sách chapters song song
+MAX_COMMENT_WORKERS = 3  # Số browser lấy các trang comments song song
+BLOCK_HEAVY_RESOURCES = True  # Chặn tải ảnh/font/media trong browser khi cào
+FICTION_WORKER_MODE = "process"  # "process" hoặc "thread"
+CHAPTER_WORKER_MODE = "async"  # 1 browser + asyncio thay vì MAX_WORKERS browser (cần lxml)
+PRETTY_JSON = False  # JSON backup không indent - file nhỏ hơn, serialize nhanh hơn
+VERBOSE = False  # Tắt log chi tiết từng trang/chương để giảm I/O stdout
+ASYNC_PRINT = True  # In log qua 1 thread riêng, worker không block ở stdout
 # Lưu ý: Tăng quá cao có thể bị ban IP hoặc tốn tài nguyên
 
 # Browser Pool - Tái sử dụng browsers
@@ -41,6 +63,9 @@ MONGODB_MAX_POOL_SIZE = 50  # Tăng connection pool
 MONGODB_MIN_POOL_SIZE = 10
 MONGODB_BULK_WRITE = True  # Dùng bulk operations
 
+# Số giây tối đa user/comment/review nằm chờ trong buffer bulk_write (flush mỗi 1s để dữ liệu lên MongoDB đều đặn)
+MONGO_FLUSH_INTERVAL = 1.0
+
 # Batch Sizes - Tăng batch để xử lý nhiều hơn
 METADATA_BATCH_SIZE = 20  # Tăng từ 10 → 20
 CHAPTER_BATCH_SIZE = 10  # Tăng từ 5 → 10
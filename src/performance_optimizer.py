@@ -2,9 +2,12 @@
 Performance Optimizer - Các tối ưu để tăng tốc độ crawl/sync
 """
 import time
+from threading import Event, Lock, Thread
+from urllib.parse import urlsplit
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pymongo import UpdateOne
 from src import config
+from src.utils import BLOCKED_HOSTS
 
 class BrowserPool:
     """
@@ -27,14 +30,14 @@ class BrowserPool:
         
         # Tạo pool browsers
         for _ in range(self.pool_size):
-            browser = self.playwright.chromium.launch(headless=config.HEADLESS)
+            browser = self.playwright.chromium.launch(headless=config.HEADLESS, args=getattr(config, 'BROWSER_LAUNCH_ARGS', None))
             self.pool.append(browser)
     
     def get_browser(self):
         """Lấy browser từ pool"""
         if not self.pool:
             # Nếu pool rỗng, tạo mới
-            return self.playwright.chromium.launch(headless=config.HEADLESS)
+            return self.playwright.chromium.launch(headless=config.HEADLESS, args=getattr(config, 'BROWSER_LAUNCH_ARGS', None))
         return self.pool.pop()
     
     def return_browser(self, browser):
@@ -54,37 +57,109 @@ class BrowserPool:
 class BulkMongoWriter:
     """
     Bulk writer cho MongoDB để tăng tốc độ ghi
+    Thread-safe bằng double buffer: lock chỉ giữ trong lúc append hoặc đổi buffer đầy lấy 1 list rỗng,
+    bulk_write chạy ngoài lock trên batch đã tách ra → các thread khác vẫn add_update vào buffer mới,
+    và nhiều thread cùng vượt batch_size không chia nhỏ 1 batch thành nhiều bulk_write
+    hint: index (vd. [("user_id", 1)]) dùng cho mọi UpdateOne, None = để MongoDB tự chọn
+    flush_interval: số giây tối đa 1 op nằm chờ trong buffer (flush theo thời gian bằng
+    1 daemon thread, ngoài flush theo batch_size), None/0 = chỉ flush khi đủ batch.
+    Thread chỉ được start ở lần add_update đầu tiên - writer tạo ra mà không ghi gì thì không có thread
+    on_written: callback(tags, succeeded) gọi sau mỗi bulk_write với tag (tham số tag của add_update)
+    của các op trong batch - để caller chỉ ghi nhận dữ liệu đã thật sự ghi xong, None = không gọi
     """
-    def __init__(self, collection, batch_size=100):
+    def __init__(self, collection, batch_size=100, hint=None, flush_interval=None, on_written=None):
         self.collection = collection
         self.batch_size = batch_size
+        self.hint = hint
+        self.on_written = on_written
         self.buffer = []
+        self._tags = []  # Song song với buffer: tag của từng op
+        self._lock = Lock()
+        self.flush_interval = flush_interval
+        self._stop_event = Event()
+        self._flush_thread = None
     
-    def add_update(self, filter_dict, update_dict):
-        """Thêm update vào buffer"""
-        self.buffer.append(
-            UpdateOne(filter_dict, {"$set": update_dict}, upsert=True)
-        )
-        
-        if len(self.buffer) >= self.batch_size:
-            self.flush()
+    def _flush_loop(self):
+        """Flush định kỳ để các op lẻ (chưa đủ batch) không phải chờ tới close()"""
+        while not self._stop_event.wait(self.flush_interval):
+            if self.buffer:
+                self.flush()
+    
+    def add_update(self, filter_dict, update_dict, tag=None):
+        """Thêm update vào buffer (tag được trả lại qua on_written sau khi batch chứa op được ghi)"""
+        op = UpdateOne(filter_dict, {"$set": update_dict}, upsert=True, hint=self.hint)
+        with self._lock:
+            if self.flush_interval and self._flush_thread is None and not self._stop_event.is_set():
+                self._flush_thread = Thread(target=self._flush_loop, daemon=True)
+                self._flush_thread.start()
+            self.buffer.append(op)
+            self._tags.append(tag)
+            if len(self.buffer) < self.batch_size:
+                return
+            # Chỉ thread làm đầy buffer lấy batch, thread sau thấy buffer mới (rỗng)
+            ops, self.buffer = self.buffer, []
+            tags, self._tags = self._tags, []
+        self._write(ops, tags)
     
     def flush(self):
         """Ghi buffer vào MongoDB"""
-        if not self.buffer:
+        with self._lock:
+            ops, self.buffer = self.buffer, []
+            tags, self._tags = self._tags, []
+        self._write(ops, tags)
+    
+    def _write(self, ops, tags):
+        """bulk_write 1 batch đã tách khỏi buffer (gọi ngoài lock)"""
+        if not ops:
             return
         
+        succeeded = True
         try:
-            self.collection.bulk_write(self.buffer, ordered=False)
-            self.buffer = []
+            self.collection.bulk_write(ops, ordered=False)
         except Exception as e:
+            succeeded = False
             print(f"⚠️ Lỗi bulk write: {e}")
-            self.buffer = []
+        if self.on_written:
+            self.on_written(tags, succeeded)
     
     def close(self):
-        """Đóng writer và flush buffer"""
+        """Đóng writer: dừng thread flush định kỳ và flush buffer"""
+        with self._lock:
+            self._stop_event.set()
+            flush_thread, self._flush_thread = self._flush_thread, None
+        if flush_thread:
+            flush_thread.join()
         self.flush()
 
+def flush_writers_parallel(writers, close=False):
+    """
+    Flush (hoặc close) nhiều BulkMongoWriter cùng lúc - mỗi writer ghi vào collection riêng
+    nên các bulk_write chạy song song trên connection pool thay vì chờ nhau tuần tự
+    
+    Args:
+        writers: List BulkMongoWriter (None được bỏ qua)
+        close: True = close() (dừng thread flush định kỳ), False = flush()
+    """
+    writers = [writer for writer in writers if writer]
+    if len(writers) <= 1:
+        for writer in writers:
+            if close:
+                writer.close()
+            else:
+                writer.flush()
+        return
+    
+    with ThreadPoolExecutor(max_workers=len(writers)) as executor:
+        futures = [
+            executor.submit(writer.close if close else writer.flush)
+            for writer in writers
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ Lỗi flush bulk writer: {e}")
+
 def parallel_sync_fictions(sync_func, fictions, max_workers=5):
     """
     Sync nhiều fictions song song
@@ -115,6 +190,10 @@ def parallel_sync_fictions(sync_func, fictions, max_workers=5):
     
     return results
 
+# Hệ số delay theo số lỗi liên tiếp (1 + error_count * 0.5), tính sẵn khi load module
+# để smart_delay chỉ cần tra tuple; quá bảng thì mới tính công thức
+ERROR_DELAY_MULTIPLIERS = tuple(1 + error_count * 0.5 for error_count in range(16))
+
 def smart_delay(base_delay, success_count=0, error_count=0):
     """
     Smart delay: Giảm delay nếu không có lỗi, tăng nếu có lỗi
@@ -129,6 +208,8 @@ def smart_delay(base_delay, success_count=0, error_count=0):
     """
     if error_count > 0:
         # Có lỗi → tăng delay
+        if error_count < len(ERROR_DELAY_MULTIPLIERS):
+            return base_delay * ERROR_DELAY_MULTIPLIERS[error_count]
         return base_delay * (1 + error_count * 0.5)
     elif success_count > 10:
         # Nhiều request thành công → giảm delay
@@ -136,17 +217,30 @@ def smart_delay(base_delay, success_count=0, error_count=0):
     else:
         return base_delay
 
+# Đuôi file bị chặn trong optimize_page_load (host tracker: BLOCKED_HOSTS dùng chung với scraper)
+BLOCKED_URL_SUFFIXES = (
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm",
+)
+
+def _route_blocked_url(route):
+    """Abort request ảnh/font/media (theo đuôi URL) hoặc tới host tracker, cho qua phần còn lại"""
+    url = route.request.url
+    path = url.split("?", 1)[0].lower()
+    host = urlsplit(url).hostname or ""
+    if path.endswith(BLOCKED_URL_SUFFIXES) or host.endswith(BLOCKED_HOSTS):
+        route.abort()
+    else:
+        route.continue_()
+
 def optimize_page_load(page):
     """
     Tối ưu page load bằng cách:
-    - Block images/CSS không cần thiết
+    - Block images/font/media và tracker không cần thiết
     - Chỉ load resources cần thiết
+    1 handler "**/*" duy nhất, so đuôi/host bằng str.endswith(tuple) thay cho glob
     """
-    # Block images và CSS để tăng tốc (nếu không cần)
-    # page.route("**/*.{png,jpg,jpeg,gif,svg,css,woff,woff2}", lambda route: route.abort())
-    
-    # Hoặc chỉ block images
-    page.route("**/*.{png,jpg,jpeg,gif,svg}", lambda route: route.abort())
+    page.route("**/*", _route_blocked_url)
     
     return page
 
@@ -3,19 +3,297 @@ import json
 import os
 import re
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from playwright.sync_api import sync_playwright
+import hashlib
+import threading
+import queue
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import functools
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
+from playwright.async_api import async_playwright
 from src import config, utils
 
 # Import MongoDB
 try:
-    from pymongo import MongoClient
+    from pymongo import MongoClient, WriteConcern
+    from src.performance_optimizer import BulkMongoWriter, flush_writers_parallel
+    # Comments/reviews/users là dữ liệu cào hàng loạt (upsert lại được) → ack từ primary là đủ,
+    # không chờ ghi journal xuống đĩa
+    BULK_WRITE_CONCERN = WriteConcern(w=1, j=False)
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
 
+# Import lxml (tùy chọn) - dùng để đọc danh sách chapters qua HTTP không cần browser
+try:
+    import requests
+    from lxml import etree, html as lxml_html
+    # XPath compile 1 lần, dùng lại cho mọi trang
+    CHAPTER_HREFS_XPATH = etree.XPath("//table[@id='chapters']/tbody/tr/td[1]//a/@href")
+    # XPath tương đương các CSS selector dùng khi parse comments (class=X ↔ _CLASS.format(X))
+    _CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+    TOP_COMMENTS_XPATH = etree.XPath(
+        f"//div[{_CLASS.format('comment')}][not(ancestor::ul[{_CLASS.format('subcomments')}])]"
+    )
+    COMMENT_DIVS_XPATH = etree.XPath(f".//div[{_CLASS.format('comment')}]")
+    COMMENT_SUBCOMMENTS_XPATH = etree.XPath(f".//ul[{_CLASS.format('subcomments')}]")
+    NEAREST_SUBCOMMENTS_XPATH = etree.XPath(f"ancestor::ul[{_CLASS.format('subcomments')}][1]")
+    COMMENT_MEDIA_XPATH = etree.XPath(f".//div[{_CLASS.format('media')} and {_CLASS.format('media-v2')}]")
+    COMMENT_USERNAME_XPATHS = (  # = COMMENT_USERNAME_SELECTORS, thử theo thứ tự ưu tiên
+        etree.XPath(f".//*[{_CLASS.format('media-heading')}]//*[{_CLASS.format('name')}]//a"),
+        etree.XPath(f".//*[{_CLASS.format('media-heading')}]//a[contains(@href, '/profile/')]"),
+    )
+    COMMENT_BODY_XPATH = etree.XPath(f".//*[{_CLASS.format('media-body')}]")
+    COMMENT_TIME_XPATH = etree.XPath(  # = "time, .timestamp, [class*='time'], [class*='date']"
+        ".//*[self::time or contains(@class, 'time') or contains(@class, 'date')]"
+    )
+    # Trang chapter: tiêu đề, nội dung và pagination comments
+    CHAPTER_TITLE_XPATH = etree.XPath("//h1")
+    CHAPTER_CONTENT_XPATH = etree.XPath(f"//div[{_CLASS.format('chapter-inner')}]")
+    COMMENT_PAGINATION_XPATHS = (  # = COMMENT_PAGINATION_SELECTORS, thử theo thứ tự ưu tiên
+        etree.XPath(f"(//ul[{_CLASS.format('pagination')}])[1]"),
+        etree.XPath(f"(//*[{_CLASS.format('pagination')}])[1]"),
+    )
+    # Trang danh sách best-rated: link truyện (= BEST_RATED_READY_SELECTOR "h2.fiction-title a")
+    FICTION_LIST_HREFS_XPATH = etree.XPath(f"//h2[{_CLASS.format('fiction-title')}]//a/@href")
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Import orjson (tùy chọn) - serialize nhanh hơn json chuẩn khi ghi file JSON của story
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Thời gian (giây) giữ cache số trang chapters của mỗi story
+MAX_PAGE_CACHE_TTL = 600
+
+# Số user gom lại trước khi ghi MongoDB bằng 1 lần bulk_write
+USER_WRITE_BATCH_SIZE = 500
+
+# Số comment/review gom lại trước khi ghi MongoDB bằng 1 lần bulk_write
+COMMENT_WRITE_BATCH_SIZE = 500
+
+# Số giây tối đa 1 user/comment/review nằm trong buffer trước khi được flush theo thời gian
+MONGO_FLUSH_INTERVAL = getattr(config, 'MONGO_FLUSH_INTERVAL', None)
+
+# Số user tối đa giữ trong cache LRU để bỏ qua lưu lại user đã gặp
+USER_CACHE_SIZE = 10000
+# Chia cache user thành nhiều stripe (mỗi stripe 1 lock riêng, chọn theo hash(user_id))
+# để các thread cào chương/comment không cùng tranh 1 lock
+USER_CACHE_STRIPES = 16
+
+# Số rows chapters tối thiểu để chuyển sang parse page.content() bằng lxml thay vì evaluate
+LXML_TOC_THRESHOLD = 300
+
+# Selector báo hiệu trang đã render xong phần cần cào (dùng thay cho time.sleep sau goto)
+BEST_RATED_READY_SELECTOR = "h2.fiction-title a"
+STORY_PAGE_READY_SELECTOR = ".fic-title"
+CHAPTER_PAGE_READY_SELECTOR = ".chapter-inner"
+PAGE_READY_TIMEOUT = 10000  # ms
+# Phần lazy-load sau khi scroll xuống cuối trang (comments, reviews, danh sách truyện):
+# chờ selector tối đa LAZY_LOAD_TIMEOUT thay cho time.sleep(2) cố định - bằng đúng mức sleep cũ
+# khi trang không có phần đó, còn trang có thì đi tiếp ngay khi element đã vào DOM
+COMMENTS_READY_SELECTOR = "div.comment"
+COMMENT_PAGINATION_READY_SELECTOR = "ul.pagination, div.comment"
+# Selector pagination theo thứ tự ưu tiên (thử lần lượt, selector thắng được cache theo loại trang).
+# Không gộp thành 1 selector "a, b, c": .first của selector hợp lấy theo thứ tự DOM, không theo ưu tiên
+CHAPTER_PAGINATION_SELECTORS = ("ul.pagination-small", "ul.pagination", ".pagination-small", ".pagination")
+COMMENT_PAGINATION_SELECTORS = ("ul.pagination", ".chapter-nav ul.pagination", ".pagination")
+LAZY_LOAD_TIMEOUT = 2000  # ms
+# Số request HTTP song song khi lấy thêm trang best-rated (nhỏ để không vượt rate limit của site)
+LISTING_FETCH_WORKERS = 2
+# CHAPTER_WORKER_MODE = "async": số trang lấy HTML mỗi đợt, parse xong mới lấy đợt sau
+# → bộ nhớ giữ HTML tối đa 1 đợt thay vì HTML của cả story (hàng nghìn chương)
+ASYNC_FETCH_BATCH_SIZE = 50
+
+# Các loại resource bị chặn khi load trang (chỉ cần HTML + JS để cào text).
+# Không chặn "stylesheet": thiếu CSS thì visibility và innerText khác đi (phần tử ẩn bằng CSS hiện ra,
+# xuống dòng theo display:block mất) - các wait state="visible" và phần lấy text đều dựa vào đó
+BLOCKED_RESOURCE_TYPES = frozenset({
+    "image", "font", "media", "imageset", "beacon", "csp_report", "texttrack",
+})
+
+# Trang fiction nhúng toàn bộ danh sách chapters dạng JSON: window.chapters = [{...}, ...];
+CHAPTERS_JSON_MARKER = "window.chapters"
+
+# Đọc config.VERBOSE 1 lần khi load module (dùng trong debug_print)
+_VERBOSE = getattr(config, 'VERBOSE', True)
+
+# Đọc 1 lần khi load module: dùng mỗi lần tạo context/launch browser (mỗi chương, mỗi worker)
+_BLOCK_HEAVY_RESOURCES = getattr(config, 'BLOCK_HEAVY_RESOURCES', True)
+_BROWSER_LAUNCH_ARGS = getattr(config, 'BROWSER_LAUNCH_ARGS', None)
+
+# Đọc BASE_URL 1 lần khi load module (dùng trong _absolutize)
+_BASE_URL = config.BASE_URL
+
+# JS lấy toàn bộ metadata của trang story trong 1 lần page.evaluate
+# - scores: span trong .stats-content ul.list-unstyled li ở vị trí con thứ 2, 4, 6, 8, 10
+#   (Overall, Style, Story, Grammar, Character)
+# - stats_values: 6 thẻ li.font-red-sunglo trong khối stats bên phải (.col-sm-6)
+#   (total_views, average_views, followers, favorites, ratings, pages)
+STORY_METADATA_JS = """() => {
+    const text = selector => {
+        const el = document.querySelector(selector);
+        return el ? el.innerText : "";
+    };
+    const cover = document.querySelector(".cover-art-container img");
+    const authorLink = document.querySelector(".fic-title h4 a");
+    const description = document.querySelector(".description");
+    const statsValues = Array.from(document.querySelectorAll("div.col-sm-6 li.font-red-sunglo"));
+    return {
+        title: text("h1"),
+        cover_url: cover ? cover.getAttribute("src") : null,
+        author_href: authorLink ? authorLink.getAttribute("href") : null,
+        author_name: authorLink ? authorLink.innerText : "",
+        category: text(".fiction-info span"),
+        status: text(".fiction-info span:nth-child(2)"),
+        tags: Array.from(document.querySelectorAll(".tags a")).map(a => a.innerText),
+        description_html: description ? description.innerHTML : "",
+        scores: [2, 4, 6, 8, 10].map(n => text(`.stats-content ul.list-unstyled li:nth-child(${n}) span`)),
+        stats_values: [0, 1, 2, 3, 4, 5].map(i => statsValues[i] ? statsValues[i].innerText : "")
+    };
+}"""
+
+# Regex chuyển HTML chương/description sang text - compile 1 lần, áp dụng theo đúng thứ tự
+HTML_TO_TEXT_RULES = (
+    (re.compile(r'<br\s*/?>', re.IGNORECASE), '\n'),       # <br>, <br/> → xuống dòng
+    (re.compile(r'</p>', re.IGNORECASE), '\n\n'),          # hết đoạn văn → 1 dòng trống
+    (re.compile(r'<p[^>]*>', re.IGNORECASE), ''),
+    (re.compile(r'</div>', re.IGNORECASE), '\n'),
+    (re.compile(r'<div[^>]*>', re.IGNORECASE), ''),
+    (re.compile(r'</h[1-6]>', re.IGNORECASE), '\n\n'),     # heading: xuống dòng trước và sau
+    (re.compile(r'<h[1-6][^>]*>', re.IGNORECASE), '\n'),
+    (re.compile(r'<[^>]+>'), ''),                          # xóa các thẻ còn lại (giữ text)
+)
+
+# Tên field theo đúng thứ tự của metadata["scores"] và metadata["stats_values"]
+STORY_SCORE_FIELDS = ("overall_score", "style_score", "story_score", "grammar_score", "character_score")
+STORY_VIEW_FIELDS = ("total_views", "average_views", "followers", "favorites", "ratings", "page_views")
+
+# JS lấy title và HTML content của trang chapter trong 1 lần page.evaluate
+CHAPTER_FIELDS_JS = """() => {
+    const title = document.querySelector("h1");
+    const content = document.querySelector(".chapter-inner");
+    return {
+        title: title ? title.innerText : "",
+        content_html: content ? content.innerHTML : ""
+    };
+}"""
+
+# Selector link username trong comment (h4.media-heading > span.name > a) theo thứ tự ưu tiên.
+# Chỉ giữ các selector tổng quát nhất: "h4.media-heading span.name a", "h4.media-heading .name a"
+# đều nằm trong ".media-heading .name a"; "h4.media-heading a[href*='/profile/']" nằm trong
+# ".media-heading a[href*='/profile/']". Href không phải profile thì _extract_profile_id trả về "".
+COMMENT_USERNAME_SELECTORS = (
+    ".media-heading .name a",
+    ".media-heading a[href*='/profile/']",
+)
+# Thử COMMENT_USERNAME_SELECTORS lần lượt trong 1 lần evaluate (selector hợp "a, b" lấy theo thứ tự DOM)
+# → [username, href] của link đầu tiên tìm được, null nếu không có
+COMMENT_USERNAME_JS = """(el, selectors) => {
+    for (const selector of selectors) {
+        const a = el.querySelector(selector);
+        if (a) return [a.innerText.trim(), a.getAttribute("href") || ""];
+    }
+    return null;
+}"""
+
+# Các selector phổ biến cho review element (thử theo thứ tự)
+REVIEW_SELECTORS = [
+    ".review",
+    ".review-item",
+    ".review-container",
+    "[class*='review']",
+    ".rating-review",
+]
+
+# Các selector nút Next của pagination chapters, theo thứ tự ưu tiên
+NEXT_BUTTON_SELECTORS = (
+    "a.pagination-button:has(i.fa-chevron-right)",
+    ".nav-arrow a:has(i.fa-chevron-right)",
+    "a:has(i.fa-chevron-right)",
+    ".nav-arrow a",
+    "a.pagination-button",
+)
+# Chọn selector cho nút Next: selector đầu tiên có phần tử cuối trông giống nút Next
+# (href chứa "page"/"next" hoặc không có href); nếu không có thì lấy selector khớp cuối cùng
+NEXT_BUTTON_INDEX_JS = """(el, selectors) => {
+    let found = -1;
+    for (let i = 0; i < selectors.length; i++) {
+        const matches = el.querySelectorAll(selectors[i]);
+        if (!matches.length) continue;
+        found = i;
+        const href = (matches[matches.length - 1].getAttribute("href") || "").toLowerCase();
+        if (!href || href.includes("page") || href.includes("next")) break;
+    }
+    return found;
+}"""
+
+# Trả về index của selector đầu tiên có element trên trang (-1 nếu không có)
+# Số trang chapters đang active trong pagination (không có nút active → trang 1)
+CURRENT_CHAPTER_PAGE_JS = """el => {
+    const a = el.querySelector('li.page-active a');
+    const n = a ? parseInt(a.innerText.trim(), 10) : NaN;
+    return isNaN(n) ? 1 : n;
+}"""
+# Href (tuyệt đối) của 1 link phân trang có số trang trong URL (page=N hoặc page/N), null nếu không có
+CHAPTER_PAGE_HREF_JS = """el => {
+    const link = Array.from(el.querySelectorAll('a[data-page], a[href]'))
+        .find(a => /page[=\\/]\\d+/.test(a.getAttribute('href') || ''));
+    return link ? link.href : null;
+}"""
+CHAPTER_PAGE_NUM_RE = re.compile(r'(page[=/])\d+')
+
+FIRST_MATCHING_SELECTOR_JS = "(selectors) => selectors.findIndex(s => document.querySelector(s) !== null)"
+
+# Các field của 1 review: tên field -> (selector, cách lấy giá trị)
+# - "text": innerText, "href": thuộc tính href, "datetime": thuộc tính datetime (fallback innerText)
+REVIEW_USERNAME_SELECTOR = "a[href*='/profile/'], .username, .reviewer-name, [class*='username']"
+REVIEW_FIELDS = {
+    "title": ("h3, h4, .review-title, [class*='title']", "text"),
+    "username": (REVIEW_USERNAME_SELECTOR, "text"),
+    "user_href": (REVIEW_USERNAME_SELECTOR, "href"),
+    "chapter_href": ("a[href*='/chapter/'], .chapter-link, [class*='chapter']", "href"),
+    "time": ("time, .timestamp, [class*='time'], [class*='date']", "datetime"),
+    "content": (".review-content, .review-text, [class*='content'], [class*='text']", "text"),
+}
+REVIEW_SCORE_SELECTOR = ".score, .rating, [class*='score'], [class*='rating']"
+# Thứ tự ưu tiên khi gán score element vào key (giống chuỗi if/elif cũ)
+REVIEW_SCORE_KEYS = ("overall", "style", "story", "grammar", "character")
+# (key, tên field) và dict score rỗng dựng sẵn 1 lần - mỗi review chỉ cần .copy()
+REVIEW_SCORE_FIELDS = tuple((key, f"{key}_score") for key in REVIEW_SCORE_KEYS)
+# Regex compile 1 lần: tìm mọi key score xuất hiện trong label/text (đã lower())
+REVIEW_SCORE_KEY_RE = re.compile("|".join(REVIEW_SCORE_KEYS))
+EMPTY_REVIEW_SCORES = dict.fromkeys((field for _, field in REVIEW_SCORE_FIELDS), "")
+REVIEW_FIELDS_JS = """(el, [fields, scoreSelector]) => {
+    const out = {review_id: el.getAttribute("id") || el.getAttribute("data-id") || ""};
+    for (const [name, [selector, mode]] of Object.entries(fields)) {
+        const e = el.querySelector(selector);
+        if (!e) {
+            out[name] = "";
+        } else if (mode === "href") {
+            out[name] = e.getAttribute("href") || "";
+        } else if (mode === "datetime") {
+            out[name] = e.getAttribute("datetime") || e.innerText.trim();
+        } else {
+            out[name] = e.innerText.trim();
+        }
+    }
+    out.scores = Array.from(el.querySelectorAll(scoreSelector))
+        .map(s => [s.innerText.trim(), s.getAttribute("data-label") || ""]);
+    return out;
+}"""
+
 # Helper function để print an toàn với encoding UTF-8
-def safe_print(*args, **kwargs):
+def _print_sync(*args, **kwargs):
     """Print function an toàn với encoding UTF-8 trên Windows"""
     try:
         # Thử print bình thường
@@ -27,13 +305,465 @@ def safe_print(*args, **kwargs):
         message = message.encode('ascii', 'replace').decode('ascii')
         print(message, **kwargs)
 
+# ASYNC_PRINT: các thread chỉ đẩy chuỗi đã format vào queue, 1 daemon thread duy nhất gom
+# hết những gì đang chờ rồi ghi stdout 1 lần + flush 1 lần → worker không chờ nhau ở stdout
+_ASYNC_PRINT = getattr(config, 'ASYNC_PRINT', False)
+_PRINT_QUEUE = queue.SimpleQueue()
+_print_thread = None
+_print_thread_lock = threading.Lock()
+
+def _write_stdout(text):
+    """Ghi 1 khối text ra stdout (fallback ASCII-safe nếu console không encode được)"""
+    try:
+        sys.stdout.write(text)
+    except UnicodeEncodeError:
+        sys.stdout.write(text.encode('ascii', 'replace').decode('ascii'))
+    sys.stdout.flush()
+
+def _print_writer_loop():
+    """Consumer duy nhất của _PRINT_QUEUE: chờ 1 message rồi rút hết các message đang chờ"""
+    while True:
+        items = [_PRINT_QUEUE.get()]
+        while True:
+            try:
+                items.append(_PRINT_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        
+        pending = []
+        for item in items:
+            if isinstance(item, threading.Event):
+                # Mốc của flush_print_queue: ghi hết phần trước mốc rồi báo đã xong
+                if pending:
+                    _write_stdout("".join(pending))
+                    pending = []
+                item.set()
+            else:
+                pending.append(item)
+        if pending:
+            _write_stdout("".join(pending))
+
+def _ensure_print_thread():
+    global _print_thread
+    if _print_thread is None or not _print_thread.is_alive():
+        with _print_thread_lock:
+            if _print_thread is None or not _print_thread.is_alive():
+                thread = threading.Thread(target=_print_writer_loop, daemon=True)
+                thread.start()
+                _print_thread = thread
+
+def flush_print_queue(timeout=5):
+    """Chờ writer thread ghi hết các message đã đẩy vào queue (gọi trước khi thoát process)"""
+    if _print_thread is None or not _print_thread.is_alive():
+        return
+    done = threading.Event()
+    _PRINT_QUEUE.put(done)
+    done.wait(timeout)
+
+atexit.register(flush_print_queue)
+
+def _reset_print_state_after_fork():
+    """
+    Process con (fork) kế thừa _print_thread không còn chạy, queue và lock có thể đang bị giữ
+    → tạo lại từ đầu, writer thread mới sẽ được start ở lần safe_print đầu tiên trong process con
+    """
+    global _PRINT_QUEUE, _print_thread, _print_thread_lock
+    _PRINT_QUEUE = queue.SimpleQueue()
+    _print_thread = None
+    _print_thread_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):  # Không có trên Windows (spawn, không kế thừa state)
+    os.register_at_fork(after_in_child=_reset_print_state_after_fork)
+
+def safe_print(*args, sep=' ', end='\n', **kwargs):
+    """Print an toàn với encoding UTF-8; ASYNC_PRINT bật thì không block ở stdout"""
+    if not _ASYNC_PRINT or kwargs:
+        _print_sync(*args, sep=sep, end=end, **kwargs)
+        return
+    _ensure_print_thread()
+    _PRINT_QUEUE.put(sep.join(str(arg) for arg in args) + end)
+
+def debug_print(message, *args):
+    """
+    Log chi tiết từng trang/chương (vòng lặp nóng): chỉ in khi config.VERBOSE bật.
+    Dùng %-style (debug_print("Trang %s", n)) để tắt VERBOSE thì không tốn công format chuỗi.
+    """
+    if _VERBOSE:
+        safe_print(message % args if args else message)
+
+# In tiến độ theo lô: 1 dòng mỗi PROGRESS_PRINT_EVERY mục hoặc sau PROGRESS_PRINT_INTERVAL giây
+PROGRESS_PRINT_EVERY = 25
+PROGRESS_PRINT_INTERVAL = 1.0  # giây
+
+class _ProgressPrinter:
+    """
+    Gom log tiến độ của nhiều worker thread: thay vì 1 dòng mỗi mục, chỉ in khi đủ
+    PROGRESS_PRINT_EVERY mục, đã quá PROGRESS_PRINT_INTERVAL giây từ lần in trước, hoặc đã xong hết.
+    Mục lỗi vẫn in riêng ngay. next() của itertools.count là atomic nên không cần lock;
+    số mục lỗi (ít gặp) đếm dưới lock để dòng tiến độ báo đúng số lỗi.
+    """
+    def __init__(self, total, label, indent="    "):
+        self.total = total
+        self.label = label
+        self.indent = indent
+        self._completed = itertools.count(1)
+        self._failed = 0
+        self._failed_lock = threading.Lock()
+        self._last_print = time.monotonic()
+    
+    def update(self, index, ok):
+        """Báo mục thứ index (0-based) đã xong, ok = có dữ liệu"""
+        completed = next(self._completed)
+        if not ok:
+            with self._failed_lock:
+                self._failed += 1
+            safe_print(f"{self.indent}⚠️ Lỗi {self.label} {index + 1}/{self.total}")
+        now = time.monotonic()
+        if (completed == self.total or completed % PROGRESS_PRINT_EVERY == 0
+                or now - self._last_print >= PROGRESS_PRINT_INTERVAL):
+            self._last_print = now
+            failed = self._failed
+            if not failed:
+                safe_print(f"{self.indent}✅ Đã xong {completed}/{self.total} {self.label}")
+            else:
+                # Chưa mục nào thành công → ❌, có cả lỗi lẫn thành công → ⚠️
+                status = "❌" if failed >= completed else "⚠️"
+                safe_print(f"{self.indent}{status} Đã xong {completed}/{self.total} {self.label} ({failed} lỗi)")
+
+def convert_html_to_formatted_text(html_content):
+    """
+    Chuyển đổi HTML sang text với định dạng đúng (giữ nguyên xuống dòng như trong UI)
+    - Mỗi thẻ <p> = một đoạn văn, các đoạn cách nhau bằng một dòng trống
+    - Thẻ <br> = xuống dòng
+    - Giữ nguyên cấu trúc như trong UI
+    Hàm module-level để sync worker dùng trực tiếp, không phải tạo RoyalRoadScraper
+    (MongoClient, bulk writers) chỉ để đổi HTML sang text
+    """
+    if not html_content:
+        return ""
+    
+    import html as html_module
+    
+    # Decode HTML entities trước
+    html_content = html_module.unescape(html_content)
+    
+    # Xử lý theo thứ tự để đảm bảo định dạng đúng
+    text = html_content
+    
+    # 1-5. Thay các thẻ HTML theo đúng thứ tự trong HTML_TO_TEXT_RULES
+    # (<br>, </p>, <p>, </div>, <div>, </hN>, <hN>, rồi xóa các thẻ còn lại)
+    for pattern, replacement in HTML_TO_TEXT_RULES:
+        text = pattern.sub(replacement, text)
+    
+    # 6. Làm sạch: xử lý các dòng trống và khoảng trắng thừa
+    lines = text.split('\n')
+    cleaned_lines = []
+    
+    prev_empty = False
+    for line in lines:
+        # Strip cả 2 bên để loại bỏ khoảng trắng thừa (từ HTML indentation)
+        stripped_line = line.strip()
+        
+        # Xử lý dòng trống
+        if not stripped_line:
+            # Chỉ thêm 1 dòng trống giữa các đoạn (không thêm nhiều dòng trống liên tiếp)
+            if not prev_empty:
+                cleaned_lines.append('')
+            prev_empty = True
+        else:
+            # Giữ nguyên dòng có nội dung (đã strip khoảng trắng thừa)
+            cleaned_lines.append(stripped_line)
+            prev_empty = False
+    
+    # Loại bỏ dòng trống ở đầu và cuối (nhưng giữ dòng trống giữa các đoạn)
+    while cleaned_lines and not cleaned_lines[0].strip():
+        cleaned_lines.pop(0)
+    while cleaned_lines and not cleaned_lines[-1].strip():
+        cleaned_lines.pop()
+    
+    result = '\n'.join(cleaned_lines)
+    
+    # Loại bỏ khoảng trắng thừa ở đầu và cuối toàn bộ text
+    # Nhưng vẫn giữ nguyên cấu trúc bên trong (các dòng trống giữa đoạn)
+    result = result.strip()
+    
+    # Đảm bảo không có khoảng trắng thừa ở đầu mỗi dòng (từ HTML indentation)
+    # Normalize lại để chắc chắn
+    if result:
+        lines = result.split('\n')
+        final_lines = []
+        for line in lines:
+            # Strip từng dòng để loại bỏ khoảng trắng thừa
+            clean_line = line.strip()
+            # Giữ dòng trống nếu là dòng trống thật
+            if not clean_line:
+                final_lines.append('')
+            else:
+                final_lines.append(clean_line)
+        result = '\n'.join(final_lines).strip()
+    
+    return result
+
+def _extract_profile_id(href):
+    """
+    Lấy user_id từ link profile (vd: /profile/12345/abc -> "12345").
+    Dùng find + slice thay vì split().split() để không tạo list trung gian.
+    """
+    return utils.extract_path_id(href, "/profile/")
+
+def build_story_stats(metadata):
+    """Ghép scores/stats_values (kết quả STORY_METADATA_JS) với tên field thành dict stats của story"""
+    return {
+        "score": dict(zip(STORY_SCORE_FIELDS, metadata["scores"])),
+        "views": dict(zip(STORY_VIEW_FIELDS, metadata["stats_values"])),
+    }
+
+def _absolutize(url):
+    """
+    Chuẩn hóa href thành full URL theo BASE_URL.
+    Nhánh phổ biến (href dạng "/fiction/...") chỉ cần so 1 ký tự và nối chuỗi,
+    các trường hợp còn lại mới dùng urljoin.
+    """
+    if not url:
+        return ""
+    if url[0] == "/" and url[1:2] != "/":
+        return _BASE_URL + url
+    if url.startswith("http"):
+        return url
+    return urljoin(_BASE_URL + "/", url)
+
+def _first_xpath_match(xpaths, node):
+    """Element đầu tiên của XPath đầu tiên (theo thứ tự ưu tiên) có kết quả, None nếu không có"""
+    for xpath in xpaths:
+        matches = xpath(node)
+        if matches:
+            return matches[0]
+    return None
+
+@functools.lru_cache(maxsize=512)
+def _normalize_listing_url(url):
+    """
+    Khóa cache cho trang danh sách truyện: chữ thường scheme + host, bỏ #fragment và "/" cuối.
+    Giữ query vì ?page=N đổi nội dung trang. lru_cache: mỗi URL chỉ phải parse 1 lần.
+    """
+    parts = urlsplit(_absolutize(url))
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}" + (f"?{parts.query}" if parts.query else "")
+
+def _chapter_page_url(page_href, page_num):
+    """URL trang chapters thứ page_num từ href mẫu của 1 link phân trang (thay số sau page= / page/)"""
+    return CHAPTER_PAGE_NUM_RE.sub(rf'\g<1>{page_num}', page_href)
+
+def _is_blocked_request(request):
+    """Request ảnh/font/media hoặc tới host tracker trong utils.BLOCKED_HOSTS → không cần tải"""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(request.url).hostname
+    return bool(host) and host.endswith(utils.BLOCKED_HOSTS)
+
+def _route_heavy_resource(route):
+    """Handler cho context.route: abort request ảnh/font/media/tracker, cho qua các request còn lại"""
+    if _is_blocked_request(route.request):
+        route.abort()
+    else:
+        route.continue_()
+
+def _block_heavy_resources(context):
+    """
+    Chặn tải các resource không cần cho việc cào text (áp dụng cho mọi page của context).
+    Ảnh bìa vẫn tải được vì utils.download_image dùng requests, không qua browser.
+    """
+    if _BLOCK_HEAVY_RESOURCES:
+        context.route("**/*", _route_heavy_resource)
+
+# Khởi động Playwright driver song song từ nhiều thread dễ bị race, nên chỉ khóa bước
+# start + launch; phần cào sau đó vẫn chạy song song (thay cho stagger index * DELAY_THREAD_START)
+_PLAYWRIGHT_LAUNCH_LOCK = threading.Lock()
+
+def _launch_worker_browser():
+    """Start Playwright + launch Chromium cho 1 worker thread, tuần tự hóa bằng lock"""
+    with _PLAYWRIGHT_LAUNCH_LOCK:
+        worker_playwright = sync_playwright().start()
+        try:
+            worker_browser = worker_playwright.chromium.launch(headless=config.HEADLESS, args=_BROWSER_LAUNCH_ARGS)
+        except Exception:
+            worker_playwright.stop()
+            raise
+    return worker_playwright, worker_browser
+
+async def _route_heavy_resource_async(route):
+    """Bản async của _route_heavy_resource"""
+    if _is_blocked_request(route.request):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _fetch_pages_html_async(browser, page_urls, max_concurrency):
+    """
+    Mở nhiều trang đồng thời trên 1 browser với Playwright async + asyncio.gather
+    (tối đa max_concurrency trang cùng lúc, mỗi trang 1 context riêng).
+    Trả về list HTML (page.content()) theo đúng thứ tự page_urls, "" nếu trang lỗi.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Đọc config 1 lần cho cả batch (closure đọc biến local thay vì tra module config mỗi trang)
+    delay = config.DELAY_BETWEEN_REQUESTS
+    timeout = config.TIMEOUT
+    
+    async def fetch(page_url):
+        async with semaphore:
+            # Delay trước khi request để tránh ban IP
+            await asyncio.sleep(delay)
+            context = await browser.new_context()
+            try:
+                if _BLOCK_HEAVY_RESOURCES:
+                    await context.route("**/*", _route_heavy_resource_async)
+                page = await context.new_page()
+                await page.goto(page_url, timeout=timeout)
+                try:
+                    await page.wait_for_selector(CHAPTER_PAGE_READY_SELECTOR, state="attached", timeout=PAGE_READY_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass
+                # Scroll xuống để load comments (lazy load), chờ comment đầu tiên thay vì sleep cố định
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                try:
+                    await page.wait_for_selector(COMMENTS_READY_SELECTOR, state="attached", timeout=LAZY_LOAD_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    pass
+                return await page.content()
+            except Exception as e:
+                safe_print(f"        ⚠️ Lỗi khi lấy trang {page_url}: {e}")
+                return ""
+            finally:
+                await context.close()
+    
+    return await asyncio.gather(*(fetch(page_url) for page_url in page_urls))
+
+class _AsyncBrowserRunner:
+    """
+    Giữ 1 Playwright async + 1 Chromium sống suốt process trên 1 event loop riêng (daemon thread),
+    để các lần lấy HTML liên tiếp (comment pages, chapters async) không phải start Playwright
+    + launch Chromium lại mỗi lần. Mỗi trang vẫn dùng 1 context riêng (rẻ, tách cookie/route).
+    Tạo lười qua instance(), đóng bằng shutdown() (đăng ký atexit).
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+    
+    @classmethod
+    def instance(cls):
+        """Lấy runner dùng chung (tạo ở lần gọi đầu tiên)"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
+    @classmethod
+    def shutdown(cls):
+        """Đóng browser, Playwright và event loop của runner dùng chung (nếu đã tạo)"""
+        with cls._instance_lock:
+            runner, cls._instance = cls._instance, None
+        if runner is not None:
+            runner._close()
+    
+    async def _get_browser(self):
+        """Launch Chromium ở lần đầu (hoặc khi browser đã chết), các lần sau dùng lại"""
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=config.HEADLESS, args=_BROWSER_LAUNCH_ARGS)
+            return self._browser
+    
+    async def _fetch(self, page_urls, max_concurrency):
+        browser = await self._get_browser()
+        return await _fetch_pages_html_async(browser, page_urls, max_concurrency)
+    
+    def fetch_pages_html(self, page_urls, max_concurrency):
+        """Bản sync của _fetch_pages_html_async, gọi được từ bất kỳ thread nào"""
+        return asyncio.run_coroutine_threadsafe(self._fetch(page_urls, max_concurrency), self._loop).result()
+    
+    async def _close_async(self):
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        finally:
+            if self._playwright is not None:
+                await self._playwright.stop()
+    
+    def _close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_async(), self._loop).result()
+        except Exception:
+            pass
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+atexit.register(_AsyncBrowserRunner.shutdown)
+
+def _reset_async_runner_after_fork():
+    """Runner tạo trước khi fork có event loop thread đã chết trong process con → bỏ, tạo lại khi cần"""
+    _AsyncBrowserRunner._instance = None
+    _AsyncBrowserRunner._instance_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_async_runner_after_fork)
+
+def _scrape_fiction_process_worker(fiction_url, index, total, max_workers):
+    """
+    Worker chạy trong process riêng (ProcessPoolExecutor) để cào MỘT fiction.
+    Hàm module-level để pickle được; mỗi process tự tạo scraper với browser và MongoClient riêng.
+    """
+    safe_print(f"\n{'='*60}")
+    safe_print(f"📖 Process-{index}: Bắt đầu cào fiction {index + 1}/{total}")
+    safe_print(f"   URL: {fiction_url}")
+    safe_print(f"{'='*60}")
+    
+    scraper = RoyalRoadScraper(max_workers=max_workers)
+    try:
+        scraper.start()
+        scraper.scrape_story(fiction_url)
+        safe_print(f"✅ Process-{index}: Hoàn thành fiction {index + 1}/{total}")
+        return True
+    except Exception as e:
+        safe_print(f"❌ Process-{index}: Lỗi khi cào fiction {index + 1}: {e}")
+        return False
+    finally:
+        scraper.stop()
+        # Process worker thoát bằng os._exit (không chạy atexit) → tự đóng browser async dùng chung
+        # và ghi nốt log còn trong queue
+        _AsyncBrowserRunner.shutdown()
+        flush_print_queue()
+
 class RoyalRoadScraper:
-    def __init__(self, max_workers=None):
+    def __init__(self, max_workers=None, mongo_parent=None):
+        """
+        mongo_parent: scraper đã kết nối MongoDB để dùng chung client, collections, bulk writers
+        và cache user (worker thread cào fiction) thay vì mở MongoClient + writers riêng.
+        Scraper dùng chung không sở hữu các tài nguyên này - chỉ scraper cha đóng chúng trong stop().
+        """
         self.browser = None
         self.context = None
         self.page = None
         self.playwright = None
         self.max_workers = max_workers or config.MAX_WORKERS
+        self._max_page_cache = {}  # {story_url: (max_page, timestamp)} - cache số trang chapters
+        self._pagination_selectors = {}  # {loại trang: selector pagination tìm được} - xem _find_pagination
+        self._listing_cache = {}  # {listing_url đã chuẩn hóa: (fiction_urls, page_size, pages_fetched, timestamp)} - cache trang best-rated
+        # Cấu hình song song đọc 1 lần khi tạo scraper thay vì getattr(config, ...) mỗi story/chương
+        self._max_toc_workers = getattr(config, 'MAX_TOC_WORKERS', 1)
+        self._max_comment_workers = getattr(config, 'MAX_COMMENT_WORKERS', 1)
+        self._chapter_worker_mode = getattr(config, 'CHAPTER_WORKER_MODE', 'thread')
         
         # Khởi tạo MongoDB client nếu được bật
         self.mongo_client = None
@@ -44,37 +774,109 @@ class RoyalRoadScraper:
         self.mongo_collection_reviews = None
         self.mongo_collection_users = None
         self.mongo_collection_scores = None
-        if config.MONGODB_ENABLED and MONGODB_AVAILABLE:
+        self.user_writer = None  # Gom các lần lưu user thành bulk_write
+        self.comment_writer = None  # Gom các lần lưu comment thành bulk_write
+        self.review_writer = None  # Gom các lần lưu review thành bulk_write
+        self.score_writer = None  # Gom các lần lưu score (1 score mỗi review) thành bulk_write
+        # LRU {user_id: username} các user đã ghi xong trong phiên, chia USER_CACHE_STRIPES stripe
+        # (cache, pending, lock) - pending: {user_id: username} đang nằm trong buffer của user_writer
+        self._user_cache_stripes = [(OrderedDict(), {}, threading.Lock()) for _ in range(USER_CACHE_STRIPES)]
+        self._owns_mongo = mongo_parent is None
+        if mongo_parent is not None:
+            self.mongo_client = mongo_parent.mongo_client
+            self.mongo_db = mongo_parent.mongo_db
+            self.mongo_collection_stories = mongo_parent.mongo_collection_stories
+            self.mongo_collection_chapters = mongo_parent.mongo_collection_chapters
+            self.mongo_collection_comments = mongo_parent.mongo_collection_comments
+            self.mongo_collection_reviews = mongo_parent.mongo_collection_reviews
+            self.mongo_collection_users = mongo_parent.mongo_collection_users
+            self.mongo_collection_scores = mongo_parent.mongo_collection_scores
+            self.user_writer = mongo_parent.user_writer
+            self.comment_writer = mongo_parent.comment_writer
+            self.review_writer = mongo_parent.review_writer
+            self.score_writer = mongo_parent.score_writer
+            self._user_cache_stripes = mongo_parent._user_cache_stripes
+        elif config.MONGODB_ENABLED and MONGODB_AVAILABLE:
             try:
                 self.mongo_client = MongoClient(config.MONGODB_URI)
                 self.mongo_db = self.mongo_client[config.MONGODB_DB_NAME]
                 self.mongo_collection_stories = self.mongo_db[config.MONGODB_COLLECTION_STORIES]
                 self.mongo_collection_chapters = self.mongo_db["chapters"]
-                self.mongo_collection_comments = self.mongo_db["comments"]
-                self.mongo_collection_reviews = self.mongo_db["reviews"]
-                self.mongo_collection_users = self.mongo_db["users"]
-                self.mongo_collection_scores = self.mongo_db["scores"]
+                self.mongo_collection_comments = self.mongo_db.get_collection("comments", write_concern=BULK_WRITE_CONCERN)
+                self.mongo_collection_reviews = self.mongo_db.get_collection("reviews", write_concern=BULK_WRITE_CONCERN)
+                self.mongo_collection_users = self.mongo_db.get_collection("users", write_concern=BULK_WRITE_CONCERN)
+                self.mongo_collection_scores = self.mongo_db.get_collection("scores", write_concern=BULK_WRITE_CONCERN)
+                indexed = self._ensure_mongo_indexes()
+                # Hint index upsert key để bỏ qua query planner (chỉ khi index đã tạo được)
+                self.user_writer = BulkMongoWriter(
+                    self.mongo_collection_users, batch_size=USER_WRITE_BATCH_SIZE,
+                    hint=[("user_id", 1)] if "users" in indexed else None,
+                    flush_interval=MONGO_FLUSH_INTERVAL,
+                    on_written=self._on_users_written
+                )
+                self.comment_writer = BulkMongoWriter(
+                    self.mongo_collection_comments, batch_size=COMMENT_WRITE_BATCH_SIZE,
+                    hint=[("comment_id", 1)] if "comments" in indexed else None,
+                    flush_interval=MONGO_FLUSH_INTERVAL
+                )
+                self.review_writer = BulkMongoWriter(
+                    self.mongo_collection_reviews, batch_size=COMMENT_WRITE_BATCH_SIZE,
+                    hint=[("review_id", 1)] if "reviews" in indexed else None,
+                    flush_interval=MONGO_FLUSH_INTERVAL
+                )
+                self.score_writer = BulkMongoWriter(
+                    self.mongo_collection_scores, batch_size=COMMENT_WRITE_BATCH_SIZE,
+                    hint=[("score_id", 1)] if "scores" in indexed else None,
+                    flush_interval=MONGO_FLUSH_INTERVAL
+                )
                 safe_print("✅ Đã kết nối MongoDB với 6 collections")
             except Exception as e:
                 safe_print(f"⚠️ Không thể kết nối MongoDB: {e}")
                 safe_print("   Tiếp tục lưu vào file JSON...")
                 self.mongo_client = None
 
+    def _ensure_mongo_indexes(self):
+        """
+        Tạo unique index cho khóa mà các hàm _save_*_to_mongo dùng để upsert (chạy 1 lần khi kết nối).
+        Không có index thì mỗi lần upsert/find_one phải quét toàn bộ collection.
+        Trả về set tên các collection đã có index (dùng để quyết định có hint hay không).
+        """
+        indexed = set()
+        for collection, key in (
+            (self.mongo_collection_stories, "id"),
+            (self.mongo_collection_chapters, "id"),
+            (self.mongo_collection_comments, "comment_id"),
+            (self.mongo_collection_reviews, "review_id"),
+            (self.mongo_collection_users, "user_id"),
+            (self.mongo_collection_scores, "score_id"),
+        ):
+            try:
+                collection.create_index([(key, 1)], unique=True, background=True)
+                indexed.add(collection.name)
+            except Exception as e:
+                # Dữ liệu cũ có thể đã bị trùng key → bỏ qua, vẫn cào bình thường
+                safe_print(f"⚠️ Không thể tạo unique index {collection.name}.{key}: {e}")
+        return indexed
+
     def start(self):
         """Khởi động trình duyệt"""
         self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS)
+        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS, args=_BROWSER_LAUNCH_ARGS)
         self.context = self.browser.new_context()
+        _block_heavy_resources(self.context)
         self.page = self.context.new_page()
         safe_print("✅ Bot đã khởi động!")
 
     def stop(self):
         """Đóng trình duyệt và MongoDB connection"""
+        # close() = dừng thread flush định kỳ + ghi nốt buffer (chỉ scraper sở hữu writers mới đóng)
+        if MONGODB_AVAILABLE and self._owns_mongo:
+            flush_writers_parallel((self.user_writer, self.comment_writer, self.review_writer, self.score_writer), close=True)
         if self.browser:
             self.browser.close()
         if self.playwright:
             self.playwright.stop()
-        if self.mongo_client:
+        if self.mongo_client and self._owns_mongo:
             self.mongo_client.close()
             safe_print("✅ Đã đóng kết nối MongoDB")
         safe_print("zzz Bot đã tắt.")
@@ -87,16 +889,12 @@ class RoyalRoadScraper:
             num_stories: Số lượng bộ truyện muốn cào (mặc định 10)
             start_from: Bắt đầu từ vị trí thứ mấy (0 = bộ đầu tiên, 5 = bỏ qua 5 bộ đầu)
         """
-        safe_print(f"📚 Đang truy cập trang best-rated: {best_rated_url}")
-        self.page.goto(best_rated_url, timeout=config.TIMEOUT)
-        time.sleep(2)
-        
         # Lấy danh sách các bộ truyện từ trang best-rated
         if start_from > 0:
             safe_print(f"🔍 Đang lấy danh sách {num_stories} bộ truyện (bắt đầu từ vị trí {start_from + 1})...")
         else:
             safe_print(f"🔍 Đang lấy danh sách {num_stories} bộ truyện đầu tiên...")
-        story_urls = self._get_fiction_urls_from_best_rated(num_stories, start_from)
+        story_urls = self._get_fiction_urls_from_best_rated(best_rated_url, num_stories, start_from)
         
         if not story_urls:
             safe_print("❌ Không tìm thấy bộ truyện nào!")
@@ -116,6 +914,7 @@ class RoyalRoadScraper:
         else:
             # Crawl tuần tự (fallback)
             safe_print(f"📖 Bắt đầu cào {len(story_urls)} bộ truyện tuần tự...")
+            story_delay = config.DELAY_BETWEEN_CHAPTERS * 2  # Tính 1 lần, dùng cho mọi vòng lặp
             for index, story_url in enumerate(story_urls, 1):
                 safe_print(f"\n{'='*60}")
                 safe_print(f"📖 Bắt đầu cào bộ truyện {index}/{len(story_urls)}")
@@ -129,62 +928,89 @@ class RoyalRoadScraper:
                 
                 # Delay giữa các bộ truyện
                 if index < len(story_urls):
-                    safe_print(f"⏳ Nghỉ {config.DELAY_BETWEEN_CHAPTERS * 2} giây trước khi cào bộ tiếp theo...")
-                    time.sleep(config.DELAY_BETWEEN_CHAPTERS * 2)
+                    safe_print(f"⏳ Nghỉ {story_delay} giây trước khi cào bộ tiếp theo...")
+                    time.sleep(story_delay)
         
         safe_print(f"\n{'='*60}")
         safe_print(f"🎉 Đã hoàn thành cào {len(story_urls)} bộ truyện!")
         safe_print(f"{'='*60}")
 
-    def _scrape_fiction_worker(self, fiction_url, index, total):
+    def _fiction_browser_worker(self, task_queue, results, worker_index, completed_counter):
+        """
+        Worker thread (FICTION_WORKER_MODE = "thread") sở hữu 1 browser trong suốt vòng đời thread,
+        lấy (index, fiction_url) từ task_queue đến khi hết; mỗi fiction chỉ tạo context mới.
+        Kết quả (True/False) ghi vào đúng vị trí index của results.
+        completed_counter: itertools.count(1) dùng chung - next() là atomic trong CPython nên không cần lock.
         """
-        Worker function để cào MỘT fiction - mỗi worker có browser instance riêng
-        Thread-safe: Mỗi worker có browser instance riêng
+        worker_playwright = None
+        worker_browser = None
+        total = len(results)
+        
+        try:
+            # Launch 1 lần cho cả worker thay vì 1 lần cho mỗi fiction
+            worker_playwright, worker_browser = _launch_worker_browser()
+            
+            while True:
+                try:
+                    index, fiction_url = task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                results[index] = self._scrape_fiction_worker(fiction_url, index, total, worker_browser)
+                completed = next(completed_counter)
+                status = "✅" if results[index] else "⚠️"
+                safe_print(f"    {status} Hoàn thành fiction {index + 1}/{total} (đã xong {completed}/{total})")
+        finally:
+            # Đóng browser của worker
+            if worker_browser:
+                try:
+                    worker_browser.close()
+                except:
+                    pass
+            if worker_playwright:
+                try:
+                    worker_playwright.stop()
+                except:
+                    pass
+
+    def _scrape_fiction_worker(self, fiction_url, index, total, worker_browser):
+        """
+        Cào MỘT fiction bằng browser của worker thread hiện tại - mỗi fiction dùng context + page riêng
+        Thread-safe: worker_browser chỉ được dùng trong thread đã tạo ra nó
         
         Args:
             fiction_url: URL của fiction cần cào
             index: Thứ tự fiction trong list
             total: Tổng số fictions
+            worker_browser: Browser của worker (launch 1 lần trong _fiction_browser_worker)
         """
-        worker_playwright = None
-        worker_browser = None
+        worker_context = None
         worker_scraper = None
         
         try:
-            # Delay để stagger các thread - tránh tất cả thread bắt đầu cùng lúc
-            time.sleep(index * config.DELAY_THREAD_START)
-            
             safe_print(f"\n{'='*60}")
             safe_print(f"📖 Worker-{index}: Bắt đầu cào fiction {index + 1}/{total}")
             safe_print(f"   URL: {fiction_url}")
             safe_print(f"{'='*60}")
             
-            # Tạo scraper instance riêng cho worker này
-            worker_scraper = RoyalRoadScraper(max_workers=self.max_workers)
+            # Scraper riêng cho fiction này, dùng chung MongoClient + bulk writers của scraper cha
+            worker_scraper = RoyalRoadScraper(max_workers=self.max_workers, mongo_parent=self)
             
-            # Tạo browser instance riêng
-            worker_playwright = sync_playwright().start()
-            worker_browser = worker_playwright.chromium.launch(headless=config.HEADLESS)
+            # Context mới cho mỗi fiction (cookie/cache tách biệt), browser dùng chung trong worker
             worker_context = worker_browser.new_context()
+            _block_heavy_resources(worker_context)
             worker_page = worker_context.new_page()
             
             # Gán page vào scraper
             worker_scraper.page = worker_page
             worker_scraper.browser = worker_browser
             worker_scraper.context = worker_context
-            worker_scraper.playwright = worker_playwright
-            
-            # Kết nối MongoDB (dùng chung connection pool)
-            if self.mongo_collection:
-                worker_scraper.mongo_client = self.mongo_client
-                worker_scraper.mongo_db = self.mongo_db
-                worker_scraper.mongo_collection = self.mongo_collection
             
             # Delay trước khi request
             time.sleep(config.DELAY_BETWEEN_REQUESTS)
             
             # Cào fiction
-            worker_scraper.scrape_fiction(fiction_url)
+            worker_scraper.scrape_story(fiction_url)
             
             safe_print(f"✅ Worker-{index}: Hoàn thành fiction {index + 1}/{total}")
             
@@ -194,21 +1020,17 @@ class RoyalRoadScraper:
             safe_print(f"❌ Worker-{index}: Lỗi khi cào fiction {index + 1}: {e}")
             return False
         finally:
-            # Đóng browser của worker
-            if worker_browser:
+            # Chỉ đóng context của fiction này, browser còn dùng cho fiction tiếp theo
+            if worker_context:
                 try:
-                    worker_browser.close()
-                except:
-                    pass
-            if worker_playwright:
-                try:
-                    worker_playwright.stop()
+                    worker_context.close()
                 except:
                     pass
 
     def _scrape_fictions_parallel(self, fiction_urls, max_workers):
         """
-        Cào nhiều fictions song song với ThreadPoolExecutor
+        Cào nhiều fictions song song với ProcessPoolExecutor (FICTION_WORKER_MODE = "process")
+        hoặc ThreadPoolExecutor (FICTION_WORKER_MODE = "thread")
         
         Args:
             fiction_urls: List URL của các fictions cần cào
@@ -217,175 +1039,221 @@ class RoyalRoadScraper:
         # Tạo list kết quả
         results = [None] * len(fiction_urls)
         
-        # Dictionary để map future -> index
-        future_to_index = {}
-        
-        # Sử dụng ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit TẤT CẢ fictions vào pool
+        # Process: mỗi fiction chạy trong process riêng (Playwright/MongoClient riêng, không bị GIL,
+        # 1 fiction lỗi không kéo theo các fiction khác).
+        # Thread: mỗi thread launch browser 1 lần rồi lần lượt lấy fiction từ queue chung.
+        use_processes = getattr(config, 'FICTION_WORKER_MODE', 'thread') == 'process'
+        
+        if use_processes:
+            # Dictionary để map future -> index
+            future_to_index = {}
+            # "spawn" thay vì fork mặc định trên Linux: process cha đang giữ pipe Playwright sync,
+            # MongoClient và các daemon thread - không cái nào an toàn khi bị fork
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                # Submit TẤT CẢ fictions vào pool
+                for index, fiction_url in enumerate(fiction_urls):
+                    future = executor.submit(_scrape_fiction_process_worker, fiction_url, index, len(fiction_urls), self.max_workers)
+                    future_to_index[future] = index
+                
+                # Thu thập kết quả theo lô: wait(FIRST_COMPLETED) trả về mọi future đã xong cùng lúc,
+                # in 1 dòng tiến độ cho cả lô thay vì 1 dòng mỗi fiction (lỗi vẫn in riêng từng fiction)
+                completed = 0
+                pending = set(future_to_index)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    succeeded = []
+                    for future in done:
+                        index = future_to_index[future]
+                        try:
+                            results[index] = future.result()
+                        except Exception as e:
+                            safe_print(f"    ❌ Lỗi khi cào fiction {index + 1}: {e}")
+                            results[index] = False
+                        if results[index]:
+                            succeeded.append(index + 1)
+                    completed += len(done)
+                    # Cả lô lỗi → ❌ (lỗi từng fiction đã in riêng ở trên), lỗi một phần → ⚠️
+                    status = "✅" if len(succeeded) == len(done) else ("⚠️" if succeeded else "❌")
+                    safe_print(
+                        f"    {status} Hoàn thành {len(succeeded)}/{len(done)} fiction {sorted(succeeded)} "
+                        f"(đã xong {completed}/{len(fiction_urls)})"
+                    )
+        elif fiction_urls:
+            task_queue = queue.Queue()
             for index, fiction_url in enumerate(fiction_urls):
-                future = executor.submit(self._scrape_fiction_worker, fiction_url, index, len(fiction_urls))
-                future_to_index[future] = index
-            
-            # Thu thập kết quả
-            completed = 0
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    result = future.result()
-                    results[index] = result
-                    completed += 1
-                    status = "✅" if result else "⚠️"
-                    safe_print(f"    {status} Hoàn thành fiction {index + 1}/{len(fiction_urls)} (đã xong {completed}/{len(fiction_urls)})")
-                except Exception as e:
-                    safe_print(f"    ❌ Lỗi khi cào fiction {index + 1}: {e}")
-                    results[index] = False
+                task_queue.put((index, fiction_url))
+            
+            num_workers = min(max_workers, len(fiction_urls))
+            completed_counter = itertools.count(1)
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = [
+                    executor.submit(self._fiction_browser_worker, task_queue, results, worker_index, completed_counter)
+                    for worker_index in range(num_workers)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        safe_print(f"    ❌ Lỗi worker cào fiction: {e}")
         
         # Thống kê
         success_count = sum(1 for r in results if r)
         safe_print(f"\n📊 Kết quả: {success_count}/{len(fiction_urls)} fictions thành công")
 
-    def _get_fiction_urls_from_best_rated(self, num_fictions=10, start_from=0):
+    def _get_fiction_urls_from_best_rated(self, best_rated_url, num_fictions=10, start_from=0):
         """
         Lấy danh sách URL của các bộ truyện từ trang best-rated
         Selector: h2.fiction-title a
+        Các trang đã lấy được cache theo URL đã chuẩn hóa trong MAX_PAGE_CACHE_TTL giây, kèm số trang
+        đã lấy: gọi lại cùng trang (URL chỉ khác hoa/thường, "/" cuối) mà không cần thêm trang nào
+        chỉ cắt lại list, không render lại - kể cả khi danh sách có ít truyện hơn số yêu cầu.
+        Cần nhiều truyện hơn 1 trang (start_from + num_fictions > số truyện/trang): các trang
+        ?page=2..N được lấy qua HTTP (_get_listing_pages_parallel).
         Args:
+            best_rated_url: URL trang best-rated
             num_fictions: Số lượng bộ truyện muốn lấy
             start_from: Bắt đầu từ vị trí thứ mấy (0 = bộ đầu tiên)
         """
-        story_urls = []
+        needed = start_from + num_fictions
+        cache_key = _normalize_listing_url(best_rated_url)
+        cached = self._listing_cache.get(cache_key)
+        if cached:
+            cached_urls, page_size, pages_fetched, cached_at = cached
+            # Hit khi các trang cần đọc (theo số truyện/trang) đều đã lấy ở lần trước
+            if time.time() - cached_at < MAX_PAGE_CACHE_TTL and -(-needed // page_size) <= pages_fetched:
+                return cached_urls[start_from:needed]
+        
+        story_urls = {}  # dict làm ordered set: bỏ trùng O(1), giữ thứ tự xuất hiện
         
         try:
-            # Scroll xuống để load thêm nội dung nếu cần
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
-            
-            # Lấy tất cả các link truyện từ thẻ h2.fiction-title a
-            fiction_links = self.page.locator("h2.fiction-title a").all()
-            
-            # Tính toán vị trí bắt đầu và kết thúc
-            start_index = start_from
-            end_index = start_from + num_fictions
-            
-            # Lấy các link từ vị trí start_from đến end_index
-            for link in fiction_links[start_index:end_index]:
-                try:
-                    href = link.get_attribute("href")
-                    if href:
-                        # Tạo full URL
-                        if href.startswith("/"):
-                            full_url = config.BASE_URL + href
-                        elif href.startswith("http"):
-                            full_url = href
-                        else:
-                            full_url = config.BASE_URL + "/" + href
-                        
-                        if full_url not in story_urls:
-                            story_urls.append(full_url)
-                except Exception as e:
-                    safe_print(f"⚠️ Lỗi khi lấy URL truyện: {e}")
-                    continue
-            
-            return story_urls
+            safe_print(f"📚 Đang truy cập trang best-rated: {best_rated_url}")
+            self.page.goto(best_rated_url, timeout=config.TIMEOUT)
+            # Danh sách render sẵn phía server (các trang sau lấy qua HTTP cũng không cần scroll),
+            # chờ link truyện đầu tiên là đủ - không cần scroll chờ lazy load
+            self._wait_for_attached(BEST_RATED_READY_SELECTOR)
+            
+            # Lấy href của tất cả các link truyện (h2.fiction-title a) trong 1 lần evaluate
+            fiction_hrefs = self.page.locator(BEST_RATED_READY_SELECTOR).evaluate_all(
+                "links => links.map(a => a.getAttribute('href'))"
+            )
+            
+            for href in fiction_hrefs:
+                if href:
+                    # Tạo full URL
+                    story_urls[_absolutize(href)] = None
+            
+            # Cần nhiều truyện hơn 1 trang: lấy các trang ?page=2..N qua HTTP + lxml
+            page_size = len(story_urls)
+            pages_fetched = 1
+            if LXML_AVAILABLE and page_size and needed > page_size:
+                page_nums = list(range(2, -(-needed // page_size) + 1))  # Chia lấy trần
+                for page_hrefs in self._get_listing_pages_parallel(best_rated_url, page_nums):
+                    story_urls.update(dict.fromkeys(_absolutize(href) for href in page_hrefs))
+                pages_fetched += len(page_nums)
+            
+            all_story_urls = list(story_urls)
+            if all_story_urls:
+                self._listing_cache[cache_key] = (all_story_urls, page_size, pages_fetched, time.time())
+            
+            # Lấy các link từ vị trí start_from đến start_from + num_fictions
+            return all_story_urls[start_from:needed]
             
         except Exception as e:
             safe_print(f"⚠️ Lỗi khi lấy danh sách truyện từ best-rated: {e}")
             return []
 
+    def _build_listing_page_url(self, url, page_num):
+        """Tạo URL trang danh sách thứ page_num: giữ các query parameter hiện có (trừ page) và thêm page=N"""
+        base_url, _, existing_params = url.partition('?')
+        params_list = [param for param in existing_params.split('&') if param and not param.startswith('page=')]
+        params_list.append(f"page={page_num}")
+        return f"{base_url}?{'&'.join(params_list)}"
+
+    def _get_listing_pages_parallel(self, listing_url, page_nums):
+        """
+        Lấy href truyện của nhiều trang danh sách (HTTP + lxml, không cần render browser), tối đa
+        LISTING_FETCH_WORKERS request song song, mỗi request vẫn nghỉ DELAY_BETWEEN_REQUESTS trước khi gửi.
+        Trả về list các list href theo đúng thứ tự page_nums, trang lỗi trả về list rỗng.
+        """
+        if not page_nums:
+            return []
+        
+        # Dùng cookies của browser context để nhận cùng HTML như Playwright
+        cookies = {}
+        if self.context:
+            cookies = {c["name"]: c["value"] for c in self.context.cookies()}
+        
+        timeout = config.TIMEOUT / 1000
+        delay = config.DELAY_BETWEEN_REQUESTS
+        
+        def fetch(page_num):
+            page_url = self._build_listing_page_url(listing_url, page_num)
+            # Delay trước khi request để tránh ban IP
+            time.sleep(delay)
+            try:
+                response = requests.get(page_url, cookies=cookies, timeout=timeout)
+                if response.status_code != 200:
+                    return []
+                return FICTION_LIST_HREFS_XPATH(lxml_html.fromstring(response.content))
+            except Exception as e:
+                safe_print(f"⚠️ Lỗi khi lấy trang danh sách {page_url}: {e}")
+                return []
+        
+        safe_print(f"🚀 Lấy thêm {len(page_nums)} trang danh sách...")
+        with ThreadPoolExecutor(max_workers=min(LISTING_FETCH_WORKERS, len(page_nums))) as executor:
+            return list(executor.map(fetch, page_nums))
+
     def scrape_story(self, story_url):
         """
         Hàm chính để cào toàn bộ 1 bộ truyện.
         Luồng đi: Vào trang truyện -> Lấy Info -> Lấy List Chapter -> Vào từng Chapter -> Lấy Content.
         """
+        # URL không phải trang truyện (/fiction/{id}/...) → bỏ qua trước khi goto
+        if "/fiction/" not in story_url:
+            safe_print(f"❌ Bỏ qua URL không phải trang truyện: {story_url}")
+            return
+        
         safe_print(f"🌍 Đang truy cập truyện: {story_url}")
         self.page.goto(story_url, timeout=config.TIMEOUT)
 
         # 1. Lấy ID truyện từ URL (Ví dụ: 21220)
-        story_id = story_url.split("/")[4]
+        story_id = utils.extract_fiction_id(story_url)
 
         # 2. Lấy thông tin tổng quan (Metadata)
         safe_print("... Đang lấy thông tin chung")
         
-        # Lấy title
-        title = self.page.locator("h1").first.inner_text()
-        
-        # Lấy URL ảnh bìa rồi tải về luôn
-        img_url_raw = self.page.locator(".cover-art-container img").get_attribute("src")
-        local_img_path = utils.download_image(img_url_raw, story_id)
+        # Lấy toàn bộ metadata (title, ảnh bìa, author, category, status, tags, description, stats)
+        # trong 1 lần page.evaluate thay vì ~20 lần gọi locator riêng lẻ
+        metadata = self.page.evaluate(STORY_METADATA_JS)
+        title = metadata["title"]
+        
+        # Lấy URL ảnh bìa - chỉ tải lại khi URL ảnh khác lần cào trước
+        # Chuẩn hóa thành full URL 1 lần ở đây (download_image bỏ qua URL tương đối)
+        img_url_raw = _absolutize(metadata["cover_url"])
+        cover_image_src_hash = hashlib.md5(img_url_raw.encode()).hexdigest() if img_url_raw else ""
+        # Đọc bản ghi story cũ để kiểm tra ảnh bìa
+        story_snapshot = self._get_story_snapshot(story_id)
+        local_img_path = self._get_cached_cover_image(story_snapshot, cover_image_src_hash)
+        if not local_img_path:
+            local_img_path = utils.download_image(img_url_raw, story_id)
 
         # Lấy author (user_id từ profile URL)
-        author_id = self.page.locator(".fic-title h4 a").first.get_attribute("href").split("/")[2]
-        author_name = self.page.locator(".fic-title h4 a").first.inner_text()
+        author_id = _extract_profile_id(metadata["author_href"] or "")
+        author_name = metadata["author_name"]
         
         # Lưu user (author) ngay vào MongoDB
         if author_id and author_name:
             self._save_user_to_mongo(author_id, author_name)
 
-        # Lấy category
-        category = self.page.locator(".fiction-info span").first.inner_text()
+        category = metadata["category"]
+        status = metadata["status"]
+        tags = metadata["tags"]
 
-        # Lấy status
-        status = self.page.locator(".fiction-info span:nth-child(2)").first.inner_text()
+        #Lấy description - giữ nguyên định dạng như trong UI (chuyển HTML sang text)
+        description = self._convert_html_to_formatted_text(metadata["description_html"])
 
-        #Lấy tags
-        tags = self.page.locator(".tags a").all_inner_texts()
-
-        #Lấy description - giữ nguyên định dạng như trong UI
-        description = ""
-        try:
-            desc_container = self.page.locator(".description").first
-            if desc_container.count() > 0:
-                # Lấy HTML để giữ định dạng
-                html_content = desc_container.inner_html()
-                # Chuyển HTML sang text với định dạng đúng
-                description = self._convert_html_to_formatted_text(html_content)
-        except Exception as e:
-            safe_print(f"⚠️ Lỗi khi lấy description: {e}")
-            description = ""
-
-        #Lấy stats
-        # stats = self.page.locator(".stats-content .list-item").all()
-        # Container chính: .stats-content ul.list-unstyled
-        base_locator = ".stats-content ul.list-unstyled li:nth-child({}) span"
-
-        # 1. Overall Score (Nằm ở vị trí con thứ 2)
-        overall_score = self.page.locator(base_locator.format(2)).inner_text()
-
-        # 2. Style Score (Vị trí con thứ 4)
-        style_score = self.page.locator(base_locator.format(4)).inner_text()
-
-        # 3. Story Score (Vị trí con thứ 6)
-        story_score = self.page.locator(base_locator.format(6)).inner_text()
-
-        # 4. Grammar Score (Vị trí con thứ 8)
-        grammar_score = self.page.locator(base_locator.format(8)).inner_text()
-
-        # 5. Character Score (Vị trí con thứ 10)
-        character_score = self.page.locator(base_locator.format(10)).inner_text()
-
-        # 1. Định vị tất cả các thẻ <li> chứa GIÁ TRỊ số liệu
-        # Sử dụng class đặc trưng (.font-red-sunglo) và giới hạn trong khối stats bên phải (.col-sm-6)
-        stats_values_locator = self.page.locator("div.col-sm-6 li.font-red-sunglo")
-        
-        # 2. Lấy giá trị bằng cách dùng chỉ mục (index)
-        
-        # Lấy total_views (Index 0)
-        total_views = stats_values_locator.nth(0).inner_text()
-        
-        # Lấy average_views (Index 1)
-        average_views = stats_values_locator.nth(1).inner_text()
-        
-        # Lấy followers (Index 2)
-        followers = stats_values_locator.nth(2).inner_text()
-        
-        # Lấy favorites (Index 3)
-        favorites = stats_values_locator.nth(3).inner_text()
-        
-        # Lấy ratings (Index 4)
-        ratings = stats_values_locator.nth(4).inner_text()
-        
-        # Lấy pages/words (Index 5 - Giá trị cuối cùng)
-        pages = stats_values_locator.nth(5).inner_text()
+        # Stats - Score (Overall, Style, Story, Grammar, Character) và Views, ghép theo STORY_*_FIELDS
+        stats = build_story_stats(metadata)
 
         # Tạo cấu trúc dữ liệu tổng quan sau khi đã lấy hết các biến
         current_time = utils.get_current_timestamp()
@@ -398,23 +1266,7 @@ class RoyalRoadScraper:
             "status": status,
             "tags": sorted(tags) if tags else [],  # Sort để hash nhất quán
             "description": description,
-            "stats": {
-                "score": {
-                    "overall_score": overall_score,
-                    "style_score": style_score,
-                    "story_score": story_score,
-                    "grammar_score": grammar_score,
-                    "character_score": character_score,
-                },
-                "views": {
-                    "total_views": total_views,
-                    "average_views": average_views,
-                    "followers": followers,
-                    "favorites": favorites,
-                    "ratings": ratings,
-                    "page_views": pages,
-                }
-            }
+            "stats": stats
         }
         
         fiction_data = {
@@ -422,28 +1274,13 @@ class RoyalRoadScraper:
             "title": title,
             "fiction_url": fiction_url,  # Thêm URL gốc
             "cover_image_local": local_img_path, # Lưu đường dẫn file trên máy
+            "cover_image_src_hash": cover_image_src_hash, # Hash URL ảnh để bỏ qua tải lại
             "author": author,
             "category": category,
             "status": status,
             "tags": tags,
             "description": description,
-            "stats": {
-                "score": {
-                    "overall_score": overall_score,
-                    "style_score": style_score,
-                    "story_score": story_score,
-                    "grammar_score": grammar_score,
-                    "character_score": character_score,
-                },
-                "views": {
-                    "total_views": total_views,
-                    "average_views": average_views,
-                    "followers": followers,
-                    "favorites": favorites,
-                    "ratings": ratings,
-                    "page_views": pages,
-                }
-            },
+            "stats": stats,
             # Hash và timestamps cho sync
             "metadata_hash": utils.hash_metadata(metadata_dict),
             "created_at": current_time,
@@ -455,7 +1292,7 @@ class RoyalRoadScraper:
         
         # Lưu score vào collection scores (từ story)
         score_id = f"{story_id}_score"
-        self._save_score_to_mongo(score_id, overall_score, style_score, story_score, grammar_score, character_score)
+        self._save_score_to_mongo(score_id, *metadata["scores"])
         
         # Lưu story ngay khi cào xong metadata (chưa có chapters và reviews)
         self._save_story_to_mongo(story_data)
@@ -477,33 +1314,8 @@ class RoyalRoadScraper:
         # 4. Cào các chương song song với ThreadPoolExecutor (GIỮ ĐÚNG THỨ TỰ)
         safe_print(f"🚀 Bắt đầu cào {len(chapter_urls)} chương với {self.max_workers} thread...")
         
-        # Tạo list kết quả cố định theo index - mỗi index = 1 chương
-        chapter_results = [None] * len(chapter_urls)
-        
-        # Dictionary để map future -> index để biết chương nào
-        future_to_index = {}
-        
-        # Sử dụng ThreadPoolExecutor - NÓ TỰ ĐỘNG PHÂN PHỐI công việc!
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit TẤT CẢ chapters vào pool - mỗi chương chỉ submit 1 LẦN
-            for index, chap_url in enumerate(chapter_urls):
-                future = executor.submit(self._scrape_single_chapter_worker, chap_url, index, story_id)
-                future_to_index[future] = index
-            
-            # Thu thập kết quả - các thread có thể hoàn thành bất kỳ lúc nào
-            completed = 0
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]  # Lấy index của chương này
-                try:
-                    chapter_data = future.result()
-                    # LƯU VÀO ĐÚNG VỊ TRÍ INDEX - không phải append!
-                    chapter_results[index] = chapter_data
-                    completed += 1
-                    status = "✅" if chapter_data else "⚠️"
-                    safe_print(f"    {status} Hoàn thành chương {index + 1}/{len(chapter_urls)} (đã xong {completed}/{len(chapter_urls)})")
-                except Exception as e:
-                    safe_print(f"    ❌ Lỗi khi cào chương {index + 1}: {e}")
-                    chapter_results[index] = None
+        # List kết quả cố định theo index - mỗi index = 1 chương
+        chapter_results = self._scrape_chapters_parallel(chapter_urls, story_id)
 
         # SAU KHI TẤT CẢ XONG: Thêm vào story_data THEO ĐÚNG THỨ TỰ
         safe_print(f"📝 Sắp xếp kết quả theo đúng thứ tự...")
@@ -518,27 +1330,82 @@ class RoyalRoadScraper:
 
         # 5. Cập nhật story trong MongoDB với đầy đủ chapters và reviews
         self._save_story_to_mongo(story_data)
+        self._flush_mongo_writers()
         
         # 6. Lưu kết quả ra JSON (backup)
         self._save_to_json(story_data)
 
+    def _get_story_snapshot(self, story_id):
+        """
+        Đọc các field cần dùng lại của story đã lưu ở lần cào trước (1 lần find_one).
+        Trả về document nếu có, {} nếu story chưa có trong MongoDB, None nếu không kiểm tra được.
+        """
+        if self.mongo_collection_stories is None:
+            return None
+        
+        try:
+            existing = self.mongo_collection_stories.find_one(
+                {"id": story_id},
+                {"cover_image_src_hash": 1, "cover_image_local": 1}
+            )
+        except Exception as e:
+            safe_print(f"⚠️ Lỗi khi đọc story trong MongoDB: {e}")
+            return None
+        return existing or {}
+
+    def _get_cached_cover_image(self, story_snapshot, cover_image_src_hash):
+        """
+        Trả về đường dẫn ảnh bìa đã tải ở lần cào trước nếu URL ảnh không đổi
+        (so sánh cover_image_src_hash trong story_snapshot) và file vẫn còn trên máy.
+        Trả về None nếu cần tải lại.
+        """
+        if not cover_image_src_hash or not story_snapshot:
+            return None
+        
+        if story_snapshot.get("cover_image_src_hash") != cover_image_src_hash:
+            return None
+        
+        local_img_path = story_snapshot.get("cover_image_local")
+        if local_img_path and os.path.exists(local_img_path):
+            return local_img_path
+        return None
+
+    def _goto_if_needed(self, url, page=None):
+        """
+        Chỉ goto khi page chưa ở đúng URL (bỏ qua query ?page=N và #fragment).
+        Trang story đã được scrape_story mở sẵn nên TOC và reviews không cần load lại.
+        Trả về True nếu đã phải navigate.
+        """
+        page = page or self.page
+        current_url = page.url.partition('#')[0].partition('?')[0].rstrip('/')
+        if current_url == url.partition('#')[0].partition('?')[0].rstrip('/'):
+            return False
+        page.goto(url, timeout=config.TIMEOUT)
+        return True
+
     def _get_all_chapters_from_pagination(self, story_url):
         """
         Lấy tất cả chapters từ tất cả các trang phân trang
         Pagination sử dụng JavaScript (AJAX), không đổi URL
         Trả về danh sách URL của tất cả chapters
         """
-        all_chapter_urls = []
+        all_chapter_urls = {}  # dict làm ordered set: các trang trùng chapters ở biên được bỏ trùng ngay khi thêm
         
         try:
+            # Fast path: đọc danh sách chapters qua HTTP + lxml (không render browser)
+            http_chapter_urls = self._try_http_toc(story_url)
+            if http_chapter_urls:
+                safe_print(f"    ⚡ Lấy được {len(http_chapter_urls)} chapters qua HTTP (không cần browser)")
+                return http_chapter_urls
+            
             # Trang đầu tiên: Lấy từ trang story chính
             safe_print(f"    📄 Đang lấy chapters từ trang 1 (trang story chính)...")
-            self.page.goto(story_url, timeout=config.TIMEOUT)
-            time.sleep(2)
+            self._goto_if_needed(story_url)
+            self._wait_for_toc()
             
             # Lấy chapters từ trang story chính
             page_chapters = self._get_chapters_from_current_page()
-            all_chapter_urls.extend(page_chapters)
+            all_chapter_urls.update(dict.fromkeys(page_chapters))
             safe_print(f"    ✅ Trang 1: Lấy được {len(page_chapters)} chapters")
             
             # Tìm số trang tối đa cho chapters từ pagination trên trang story chính
@@ -547,100 +1414,321 @@ class RoyalRoadScraper:
             # Nếu chỉ có 1 trang, return luôn
             if max_page <= 1:
                 safe_print(f"    📚 Chỉ có 1 trang chapters")
-                return all_chapter_urls
+                return list(all_chapter_urls)
             
             safe_print(f"    📚 Tìm thấy {max_page} trang chapters (trang 1 đã lấy, còn {max_page - 1} trang nữa)")
             
+            # Nhiều trang: chia các trang còn lại cho nhiều browser chạy song song
+            max_toc_workers = self._max_toc_workers
+            if max_toc_workers > 1 and max_page > 2:
+                page_nums = list(range(2, max_page + 1))
+                all_chapter_urls.update(dict.fromkeys(self._get_chapter_pages_parallel(story_url, page_nums, max_toc_workers)))
+                return list(all_chapter_urls)
+            
             # Loop qua từng trang còn lại (từ trang 2 trở đi)
             # Sử dụng click vào pagination để load thêm chapters (AJAX, không đổi URL)
             for page_num in range(2, max_page + 1):
-                safe_print(f"    📄 Đang lấy chapters từ trang {page_num}/{max_page}...")
+                debug_print("    📄 Đang lấy chapters từ trang %s/%s...", page_num, max_page)
                 
                 # Click vào nút pagination để chuyển trang (AJAX load, không đổi URL)
                 if not self._go_to_chapter_page(page_num):
-                    safe_print(f"    ⚠️ Không thể chuyển đến trang {page_num}, dừng lại")
+                    safe_print(
+                        f"    ❌ Không thể chuyển đến trang {page_num}, danh sách chapters KHÔNG đầy đủ "
+                        f"(thiếu trang {page_num}-{max_page})"
+                    )
                     break
                 
-                # Đợi AJAX load xong
-                time.sleep(2)
-                
                 # Lấy chapters từ trang hiện tại
                 page_chapters = self._get_chapters_from_current_page()
-                all_chapter_urls.extend(page_chapters)
+                all_chapter_urls.update(dict.fromkeys(page_chapters))
                 
-                safe_print(f"    ✅ Trang {page_num}: Lấy được {len(page_chapters)} chapters")
+                debug_print("    ✅ Trang %s: Lấy được %s chapters", page_num, len(page_chapters))
                 
                 # Delay giữa các trang
                 if page_num < max_page:
                     time.sleep(1)
             
-            return all_chapter_urls
+            return list(all_chapter_urls)
             
         except Exception as e:
             safe_print(f"    ⚠️ Lỗi khi lấy chapters từ pagination: {e}")
             # Fallback: Lấy từ trang đầu tiên (trang story chính)
             try:
                 self.page.goto(story_url, timeout=config.TIMEOUT)
-                time.sleep(2)
+                self._wait_for_toc()
                 return self._get_chapters_from_current_page()
-            except:
+            except PlaywrightError:
                 return []
 
+    def _get_chapter_pages_parallel(self, story_url, page_nums, max_workers):
+        """
+        Lấy chapters từ nhiều trang phân trang song song với ThreadPoolExecutor.
+        Các trang được chia thành các đoạn liên tiếp, mỗi worker có browser riêng và goto thẳng
+        URL từng trang trong đoạn của mình (href mẫu page=N đọc từ pagination của self.page).
+        Pagination không có href page=N thì không chạy song song (worker nào cũng phải click
+        lần lượt từ trang 1 - không nhanh hơn tuần tự) mà lấy tuần tự trên self.page.
+        Trả về danh sách URL theo đúng thứ tự trang.
+        """
+        page_href = None
+        pagination = self._find_chapter_pagination()
+        if pagination:
+            try:
+                page_href = pagination.evaluate(CHAPTER_PAGE_HREF_JS)
+            except PlaywrightError:
+                pass
+        if not page_href:
+            safe_print(f"    📄 Pagination không có URL theo trang, lấy tuần tự {len(page_nums)} trang còn lại...")
+            page_results = self._step_through_chapter_pages(page_nums)
+            return self._join_chapter_pages(page_nums, page_results)
+        
+        num_workers = min(max_workers, len(page_nums))
+        chunk_size = -(-len(page_nums) // num_workers)  # Chia lấy trần
+        chunks = [page_nums[i:i + chunk_size] for i in range(0, len(page_nums), chunk_size)]
+        
+        safe_print(f"    🚀 Lấy {len(page_nums)} trang chapters còn lại với {len(chunks)} workers song song...")
+        
+        page_results = {}
+        storage_state = self._get_storage_state()
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [
+                executor.submit(self._get_chapter_pages_worker, story_url, page_href, chunk, index, storage_state)
+                for index, chunk in enumerate(chunks)
+            ]
+            for future in as_completed(futures):
+                try:
+                    page_results.update(future.result())
+                except Exception as e:
+                    safe_print(f"    ❌ Lỗi khi lấy trang chapters song song: {e}")
+        
+        # Trang worker không chuyển tới được → lấy lại tuần tự trên page chính (đi từng trang từ trang 1)
+        missing = [page_num for page_num in page_nums if page_num not in page_results]
+        if missing:
+            safe_print(f"    🔁 {len(missing)} trang chapters lỗi khi chạy song song, lấy lại tuần tự...")
+            try:
+                self.page.goto(story_url, timeout=config.TIMEOUT)
+                self._wait_for_toc()
+                page_results.update(self._step_through_chapter_pages(missing))
+            except PlaywrightError as e:
+                safe_print(f"    ⚠️ Lỗi khi lấy lại trang chapters tuần tự: {e}")
+        
+        return self._join_chapter_pages(page_nums, page_results)
+
+    def _join_chapter_pages(self, page_nums, page_results):
+        """
+        Ghép chapters của các trang theo đúng thứ tự page_nums từ dict {page_num: [chapter_urls]}.
+        Thiếu trang nào thì báo lỗi rõ ràng (danh sách chapters không đầy đủ).
+        """
+        chapter_urls = []
+        missing = []
+        for page_num in page_nums:
+            if page_num in page_results:
+                chapter_urls.extend(page_results[page_num])
+            else:
+                missing.append(page_num)
+        if missing:
+            safe_print(f"    ❌ Danh sách chapters KHÔNG đầy đủ: thiếu {len(missing)} trang {missing}")
+        return chapter_urls
+
+    def _step_through_chapter_pages(self, page_nums, page=None, label="TOC"):
+        """
+        Đi lần lượt từng trang (2, 3, ...) tới trang lớn nhất trong page_nums, bắt đầu từ trang 1 đang mở.
+        Trang liền kề luôn nằm trong cửa sổ pagination đang hiển thị nên luôn click được, còn nhảy thẳng
+        tới trang xa có thể thất bại (không có href page=, quá giới hạn click Next).
+        Trả về dict {page_num: [chapter_urls]} cho các trang trong page_nums, dừng ở trang đầu tiên lỗi.
+        """
+        page = page or self.page
+        wanted = set(page_nums)
+        results = {}
+        for page_num in range(2, max(page_nums) + 1):
+            if not self._go_to_chapter_page(page_num, page):
+                safe_print(f"    ⚠️ {label}: Không thể chuyển đến trang {page_num}, dừng lại")
+                break
+            if page_num in wanted:
+                results[page_num] = self._get_chapters_from_current_page(page)
+                debug_print("    ✅ %s: Trang %s: Lấy được %s chapters", label, page_num, len(results[page_num]))
+        return results
+
+    def _get_chapter_pages_worker(self, story_url, page_href, page_nums, index, storage_state=None):
+        """
+        Worker lấy chapters từ một đoạn trang liên tiếp - mỗi worker có browser instance riêng.
+        Mỗi trang được mở thẳng bằng URL dựng từ page_href (href mẫu page=N), kiểm tra trang active
+        đúng page_num rồi mới đọc. Trang không mở được theo URL thì fallback: quay về trang 1
+        và click lần lượt (_step_through_chapter_pages) cho các trang còn thiếu.
+        Trả về dict {page_num: [chapter_urls]}
+        """
+        worker_playwright = None
+        worker_browser = None
+        results = {}
+        
+        try:
+            worker_playwright, worker_browser = _launch_worker_browser()
+            worker_context = worker_browser.new_context(storage_state=storage_state)
+            _block_heavy_resources(worker_context)
+            worker_page = worker_context.new_page()
+            
+            label = f"TOC-Worker-{index}"
+            for page_num in page_nums:
+                worker_page.goto(_chapter_page_url(page_href, page_num), timeout=config.TIMEOUT)
+                self._wait_for_toc(page_num, worker_page)
+                pagination = self._find_chapter_pagination(worker_page)
+                # Site bỏ qua page=N (vẫn trả trang 1) → dừng, để fallback click lần lượt
+                if not pagination or pagination.evaluate(CURRENT_CHAPTER_PAGE_JS) != page_num:
+                    safe_print(f"    ⚠️ {label}: URL không mở đúng trang {page_num}, chuyển sang click lần lượt")
+                    break
+                results[page_num] = self._get_chapters_from_current_page(worker_page)
+                debug_print("    ✅ %s: Trang %s: Lấy được %s chapters", label, page_num, len(results[page_num]))
+            
+            missing = [page_num for page_num in page_nums if page_num not in results]
+            if missing:
+                worker_page.goto(story_url, timeout=config.TIMEOUT)
+                self._wait_for_toc(page=worker_page)
+                results.update(self._step_through_chapter_pages(missing, worker_page, label))
+            return results
+            
+        except Exception as e:
+            safe_print(f"    ⚠️ TOC-Worker-{index}: Lỗi khi lấy chapters: {e}")
+            return results
+        finally:
+            if worker_browser:
+                worker_browser.close()
+            if worker_playwright:
+                worker_playwright.stop()
+
+    def _get_storage_state(self):
+        """
+        Chụp session (cookies + localStorage) của context chính để các worker browser
+        tạo context đã có sẵn session thay vì bắt đầu từ context trống.
+        Chỉ gọi từ thread đã start() scraper (Playwright sync không dùng chung giữa các thread).
+        """
+        if not self.context:
+            return None
+        try:
+            return self.context.storage_state()
+        except PlaywrightError:
+            return None
+
+    def _try_http_toc(self, story_url):
+        """
+        Lấy danh sách chapters bằng HTTP, không cần render trang trong browser.
+        Ưu tiên đọc JSON window.chapters nhúng trong trang (có đủ chapters của mọi trang phân trang),
+        nếu không có thì parse bảng chapters bằng lxml (chỉ khi không có phân trang AJAX).
+        Trả về list URL, hoặc None để caller fallback sang Playwright.
+        """
+        if not LXML_AVAILABLE:
+            return None
+        
+        try:
+            # Dùng cookies của browser context để nhận cùng HTML như Playwright
+            cookies = {}
+            if self.context:
+                cookies = {c["name"]: c["value"] for c in self.context.cookies()}
+            
+            response = requests.get(story_url, cookies=cookies, timeout=config.TIMEOUT / 1000)
+            if response.status_code != 200:
+                return None
+            
+            json_chapter_urls = self._parse_embedded_chapters_json(response.text)
+            if json_chapter_urls:
+                return json_chapter_urls
+            
+            tree = lxml_html.fromstring(response.content)
+            
+            # Có nhiều trang chapters → cần JS pagination, để Playwright xử lý
+            if tree.xpath("//ul[contains(@class,'pagination')]//a[@data-page > 1]"):
+                return None
+            
+            hrefs = CHAPTER_HREFS_XPATH(tree)
+            if not hrefs:
+                return None
+            
+            # dict.fromkeys: bỏ URL trùng trong 1 lượt, giữ thứ tự
+            return list(dict.fromkeys(_absolutize(href) for href in hrefs))
+            
+        except Exception as e:
+            safe_print(f"        ⚠️ Không lấy được chapters qua HTTP, dùng browser: {e}")
+            return None
+
+    def _parse_embedded_chapters_json(self, html_text):
+        """
+        Đọc mảng JSON window.chapters mà trang fiction nhúng sẵn trong <script>
+        (mỗi phần tử có "url", "order", ...). Trả về list URL theo thứ tự, None nếu không có.
+        """
+        marker = html_text.find(CHAPTERS_JSON_MARKER)
+        if marker < 0:
+            return None
+        start = html_text.find("[", marker + len(CHAPTERS_JSON_MARKER))
+        if start < 0:
+            return None
+        
+        try:
+            # raw_decode dừng đúng ở cuối mảng, không bị ảnh hưởng bởi "]" trong title
+            chapters, _ = json.JSONDecoder().raw_decode(html_text, start)
+        except ValueError:
+            return None
+        
+        chapters = [c for c in chapters if isinstance(c, dict) and c.get("url")]
+        if not chapters:
+            return None
+        chapters.sort(key=lambda c: c.get("order", 0))
+        return list(dict.fromkeys(_absolutize(c["url"]) for c in chapters))
+
+    def _find_chapter_pagination(self, page=None):
+        """
+        Tìm pagination element của danh sách chapters.
+        Trả về locator hoặc None nếu không có pagination.
+        """
+        return self._find_pagination("chapters", CHAPTER_PAGINATION_SELECTORS, page)
+
+    def _find_pagination(self, page_type, selectors, page=None):
+        """
+        Tìm pagination theo thứ tự ưu tiên của selectors (1 lần evaluate qua _first_matching_selector).
+        Selector tìm được được cache trong self._pagination_selectors theo page_type để các lần
+        gọi sau (các trang AJAX, các chương khác) chỉ cần 1 lần count(); cache trượt thì dò lại cả list.
+        Trả về locator hoặc None nếu không có pagination.
+        """
+        page = page or self.page
+        cached = self._pagination_selectors.get(page_type)
+        if cached:
+            pagination = page.locator(cached).first
+            if pagination.count() > 0:
+                return pagination
+        selector = self._first_matching_selector(selectors, page)
+        if selector is None:
+            return None
+        self._pagination_selectors[page_type] = selector
+        return page.locator(selector).first
+
     def _get_max_chapter_page(self):
-        """Lấy số trang chapters tối đa từ pagination"""
+        """
+        Lấy số trang chapters tối đa từ pagination
+        Kết quả được cache theo URL trang story trong MAX_PAGE_CACHE_TTL giây
+        (danh sách chapters ít thay đổi, crawl lại/retry cùng story không cần dò lại pagination)
+        """
+        cache_key = self.page.url.partition('?')[0]
+        cached = self._max_page_cache.get(cache_key)
+        if cached and time.time() - cached[1] < MAX_PAGE_CACHE_TTL:
+            return cached[0]
+        
         try:
-            # Scroll xuống để load pagination
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
+            # Chỉ scroll khi bảng chapters chưa được load (lazy load)
+            self._ensure_toc_loaded()
             
             max_page = 1  # Mặc định là 1 trang
             
             # Tìm pagination element - có thể là pagination-small hoặc pagination
-            pagination_selectors = [
-                "ul.pagination-small",
-                "ul.pagination",
-                ".pagination-small",
-                ".pagination"
-            ]
-            
-            pagination = None
-            for selector in pagination_selectors:
-                try:
-                    pagination = self.page.locator(selector).first
-                    if pagination.count() > 0:
-                        break
-                except:
-                    continue
-            
-            if pagination and pagination.count() > 0:
-                # Lấy tất cả các link có data-page attribute
-                page_links = pagination.locator("a[data-page]").all()
-                
-                page_numbers = []
-                for link in page_links:
-                    try:
-                        page_num_str = link.get_attribute("data-page")
-                        if page_num_str:
-                            page_num = int(page_num_str)
-                            page_numbers.append(page_num)
-                    except:
-                        continue
-                
-                # Nếu không có data-page, thử lấy từ text content
-                if not page_numbers:
-                    try:
-                        all_links = pagination.locator("a").all()
-                        for link in all_links:
-                            try:
-                                link_text = link.inner_text().strip()
-                                # Bỏ qua các nút navigation (Next, Previous) và icon
-                                if link_text.isdigit():
-                                    page_num = int(link_text)
-                                    page_numbers.append(page_num)
-                            except:
-                                continue
-                    except:
-                        pass
+            pagination = self._find_chapter_pagination()
+            
+            if pagination:
+                # Lấy data-page (hoặc text nếu không có data-page) của tất cả link trong 1 lần evaluate
+                # thay vì gọi get_attribute/inner_text cho từng link
+                # Chỉ giữ giá trị là số ngay trong JS (bỏ qua nút Next, Previous, icon) → payload nhỏ hơn,
+                # Python nhận về list số nguyên sẵn
+                page_numbers = pagination.evaluate(
+                    """el => Array.from(el.querySelectorAll('a'))
+                        .map(a => a.getAttribute('data-page') || a.textContent.trim())
+                        .filter(value => /^\\d+$/.test(value))
+                        .map(Number)"""
+                )
                 
                 if page_numbers:
                     max_page = max(page_numbers)
@@ -649,6 +1737,7 @@ class RoyalRoadScraper:
                     # Nếu không tìm thấy số trang, có thể chỉ có 1 trang
                     safe_print(f"        📄 Không tìm thấy pagination, giả sử có 1 trang")
             
+            self._max_page_cache[cache_key] = (max_page, time.time())
             return max_page
         except Exception as e:
             safe_print(f"        ⚠️ Lỗi khi lấy số trang chapters: {e}")
@@ -660,44 +1749,20 @@ class RoyalRoadScraper:
         
         try:
             # Tìm pagination
-            pagination_selectors = [
-                "ul.pagination-small",
-                "ul.pagination",
-                ".pagination-small",
-                ".pagination"
-            ]
-            
-            pagination = None
-            for selector in pagination_selectors:
-                try:
-                    pagination = self.page.locator(selector).first
-                    if pagination.count() > 0:
-                        break
-                except:
-                    continue
+            pagination = self._find_chapter_pagination()
             
-            if pagination and pagination.count() > 0:
-                # Lấy tất cả các link có data-page attribute
-                page_links = pagination.locator("a[data-page]").all()
+            if pagination:
+                # Lấy (data-page, href) của tất cả link phân trang trong 1 lần evaluate
+                page_links = pagination.evaluate(
+                    """el => Array.from(el.querySelectorAll('a[data-page]'))
+                        .map(a => [a.getAttribute('data-page') || '', a.getAttribute('href')])"""
+                )
                 
                 url_map = {}  # {page_num: url}
-                for link in page_links:
-                    try:
-                        page_num_str = link.get_attribute("data-page")
-                        if page_num_str:
-                            page_num = int(page_num_str)
-                            href = link.get_attribute("href")
-                            if href:
-                                # Tạo full URL
-                                if href.startswith("/"):
-                                    full_url = config.BASE_URL + href
-                                elif href.startswith("http"):
-                                    full_url = href
-                                else:
-                                    full_url = config.BASE_URL + "/" + href
-                                url_map[page_num] = full_url
-                    except:
-                        continue
+                for page_num_str, href in page_links:
+                    if page_num_str.isdigit() and href:
+                        # Tạo full URL
+                        url_map[int(page_num_str)] = _absolutize(href)
                 
                 # Sắp xếp và thêm vào list
                 for page_num in sorted(url_map.keys()):
@@ -709,105 +1774,75 @@ class RoyalRoadScraper:
         
         return page_urls
 
-    def _go_to_chapter_page(self, page_num):
+    def _go_to_chapter_page(self, page_num, page=None):
         """
         Chuyển đến trang chapters cụ thể bằng cách click vào link hoặc nút Next
         Trả về True nếu thành công, False nếu thất bại
         """
+        page = page or self.page
         try:
             # Tìm pagination
-            pagination_selectors = [
-                "ul.pagination-small",
-                "ul.pagination",
-                ".pagination-small",
-                ".pagination"
-            ]
-            
-            pagination = None
-            for selector in pagination_selectors:
-                try:
-                    pagination = self.page.locator(selector).first
-                    if pagination.count() > 0:
-                        break
-                except:
-                    continue
+            pagination = self._find_chapter_pagination(page)
             
-            if not pagination or pagination.count() == 0:
+            if not pagination:
                 return False
             
-            # Cách 1: Thử tìm link có data-page = page_num
+            # Đọc trang đang active 1 lần - nếu đã ở đúng trang thì không cần click gì
+            current_page = pagination.evaluate(CURRENT_CHAPTER_PAGE_JS)
+            if current_page == page_num:
+                return True
+            
+            # Cách 1 + 2: Tìm và click link trang trong 1 lần evaluate
+            # - Ưu tiên link có data-page = page_num
+            # - Nếu không có, tìm link có text = page_num (bỏ qua nút navigation .nav-arrow)
             try:
-                page_link = pagination.locator(f'a[data-page="{page_num}"]').first
-                if page_link.count() > 0:
-                    page_link.click()
-                    time.sleep(2)
+                clicked = pagination.evaluate(
+                    """(el, n) => {
+                        const anchors = Array.from(el.querySelectorAll('a'));
+                        const match = anchors.find(a => a.getAttribute('data-page') === String(n))
+                            || anchors.find(a => a.innerText.trim() === String(n)
+                                && !(a.closest('li')?.className || '').includes('nav-arrow'));
+                        if (match) {
+                            match.click();
+                            return true;
+                        }
+                        return false;
+                    }""",
+                    page_num
+                )
+                if clicked:
+                    self._wait_for_toc(page_num, page)
                     return True
-            except:
+            except PlaywrightError:
                 pass
             
-            # Cách 2: Nếu không có data-page, thử tìm link có text = page_num
-            # Lấy tất cả các link trong pagination và tìm link có text = page_num
+            # Cách 3: Điều hướng thẳng bằng URL - lấy href của 1 link phân trang bất kỳ,
+            # thay số trang trong URL rồi goto 1 lần (thay vì click Next nhiều lần)
             try:
-                all_links = pagination.locator("a").all()
-                for link in all_links:
-                    try:
-                        link_text = link.inner_text().strip()
-                        # Kiểm tra xem text có phải là số và bằng page_num không
-                        if link_text.isdigit() and int(link_text) == page_num:
-                            # Kiểm tra xem không phải là nút navigation (không có class nav-arrow)
-                            parent_class = link.evaluate("el => el.closest('li')?.className || ''")
-                            if "nav-arrow" not in parent_class:
-                                link.click()
-                                time.sleep(2)
-                                return True
-                    except:
-                        continue
-            except:
+                page_href = pagination.evaluate(CHAPTER_PAGE_HREF_JS)
+                if page_href:
+                    page_url = _chapter_page_url(page_href, page_num)
+                    page.goto(page_url, timeout=config.TIMEOUT)
+                    self._wait_for_toc(page=page)
+                    return True
+            except PlaywrightError:
                 pass
             
-            # Cách 3: Click nút "Next" nhiều lần (chỉ dùng nếu page_num nhỏ)
+            # Cách 4: Click nút "Next" nhiều lần (fallback cuối cùng, chỉ dùng nếu page_num nhỏ)
             # Tìm nút Next (có class nav-arrow hoặc chứa icon chevron-right)
             if page_num <= 10:  # Giới hạn để tránh click quá nhiều
-                # Tìm trang hiện tại
-                current_page = 1
-                try:
-                    active_page = pagination.locator("li.page-active a").first
-                    if active_page.count() > 0:
-                        active_text = active_page.inner_text().strip()
-                        if active_text.isdigit():
-                            current_page = int(active_text)
-                except:
-                    pass
-                
+                # current_page đã đọc ở đầu hàm
                 # Click Next cho đến khi đến trang cần
                 while current_page < page_num:
                     # Tìm nút Next (có thể là .nav-arrow với icon chevron-right)
-                    next_selectors = [
-                        'a.pagination-button:has(i.fa-chevron-right)',
-                        '.nav-arrow a:has(i.fa-chevron-right)',
-                        'a:has(i.fa-chevron-right)',
-                        '.nav-arrow a',
-                        'a.pagination-button'
-                    ]
+                    next_button = self._find_next_button(pagination)
                     
-                    next_button = None
-                    for selector in next_selectors:
-                        try:
-                            next_button = pagination.locator(selector).last  # Lấy nút cuối (Next)
-                            if next_button.count() > 0:
-                                # Kiểm tra xem có phải nút Next không (không phải Previous)
-                                href = next_button.get_attribute("href") or ""
-                                if "page" in href.lower() or "next" in href.lower() or not href:
-                                    break
-                        except:
-                            continue
-                    
-                    if next_button and next_button.count() > 0:
+                    if next_button:
                         try:
                             next_button.click()
-                            time.sleep(2)
                             current_page += 1
-                        except:
+                            self._wait_for_toc(current_page, page)
+                        except PlaywrightError:
                             return False
                     else:
                         return False
@@ -820,168 +1855,157 @@ class RoyalRoadScraper:
             safe_print(f"        ⚠️ Lỗi khi chuyển đến trang {page_num}: {e}")
             return False
 
-    def _get_chapters_from_current_page(self):
-        """Lấy danh sách chapters từ trang hiện tại"""
-        chapter_urls = []
-        
+    def _find_next_button(self, pagination):
+        """
+        Tìm nút Next trong pagination theo chuỗi fallback NEXT_BUTTON_SELECTORS trong 1 lần evaluate
+        (thay vì count() + get_attribute() cho từng selector).
+        Trả về locator của nút (phần tử cuối khớp selector được chọn) hoặc None.
+        """
         try:
-            # Lấy tất cả các rows trong table chapters
-            chapter_rows = self.page.locator("table#chapters tbody tr").all()
-            
-            for row in chapter_rows:
-                try:
-                    link_el = row.locator("td").first.locator("a")
-                    if link_el.count() > 0:
-                        url = link_el.get_attribute("href")
-                        if url:
-                            # Tạo full URL
-                            if url.startswith("/"):
-                                full_url = config.BASE_URL + url
-                            elif url.startswith("http"):
-                                full_url = url
-                            else:
-                                full_url = config.BASE_URL + "/" + url
-                            
-                            # Tránh duplicate
-                            if full_url not in chapter_urls:
-                                chapter_urls.append(full_url)
-                except:
-                    continue
-            
-            return chapter_urls
-            
-        except Exception as e:
-            safe_print(f"        ⚠️ Lỗi khi lấy chapters từ trang hiện tại: {e}")
-            return []
+            index = pagination.evaluate(NEXT_BUTTON_INDEX_JS, list(NEXT_BUTTON_SELECTORS))
+        except PlaywrightError:
+            return None
+        if index < 0:
+            return None
+        return pagination.locator(NEXT_BUTTON_SELECTORS[index]).last
 
-    def _convert_html_to_formatted_text(self, html_content):
+    def _wait_for_attached(self, selector, page=None):
         """
-        Chuyển đổi HTML sang text với định dạng đúng (giữ nguyên xuống dòng như trong UI)
-        - Mỗi thẻ <p> = một đoạn văn, các đoạn cách nhau bằng một dòng trống
-        - Thẻ <br> = xuống dòng
-        - Giữ nguyên cấu trúc như trong UI
+        Đợi selector xuất hiện trong DOM (state="attached") thay vì time.sleep cố định sau goto.
+        Hết PAGE_READY_TIMEOUT mà chưa thấy thì bỏ qua, để bước parse phía sau tự xử lý.
         """
-        if not html_content:
-            return ""
-        
-        import html as html_module
-        
-        # Decode HTML entities trước
-        html_content = html_module.unescape(html_content)
-        
-        # Xử lý theo thứ tự để đảm bảo định dạng đúng
-        text = html_content
-        
-        # 1. Xử lý <br> và <br/> trước - xuống dòng ngay lập tức
-        text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-        
-        # 2. Xử lý các thẻ block: <p> - mỗi đoạn văn cách nhau 1 dòng trống
-        # Thay thế </p> thành dấu phân cách đoạn (2 dòng xuống)
-        text = re.sub(r'</p>', '\n\n', text, flags=re.IGNORECASE)
-        # Xóa thẻ mở <p>
-        text = re.sub(r'<p[^>]*>', '', text, flags=re.IGNORECASE)
-        
-        # 3. Xử lý các thẻ block khác: <div> - xuống dòng
-        text = re.sub(r'</div>', '\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<div[^>]*>', '', text, flags=re.IGNORECASE)
-        
-        # 4. Xử lý các thẻ heading (h1, h2, h3, ...) - xuống dòng trước và sau
-        text = re.sub(r'</h[1-6]>', '\n\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<h[1-6][^>]*>', '\n', text, flags=re.IGNORECASE)
-        
-        # 5. Xóa tất cả các thẻ HTML còn lại (giữ lại text)
-        text = re.sub(r'<[^>]+>', '', text)
+        page = page or self.page
+        try:
+            page.wait_for_selector(selector, state="attached", timeout=PAGE_READY_TIMEOUT)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    def _scroll_and_wait(self, selector, page=None):
+        """Scroll xuống cuối trang (kích hoạt lazy load) rồi chờ selector tối đa LAZY_LOAD_TIMEOUT"""
+        page = page or self.page
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        try:
+            page.wait_for_selector(selector, state="attached", timeout=LAZY_LOAD_TIMEOUT)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    def _first_matching_selector(self, selectors, page=None):
+        """
+        Trả về selector đầu tiên (theo thứ tự ưu tiên) có element trên trang, None nếu không có.
+        Kiểm tra cả danh sách trong 1 lần evaluate thay vì gọi locator().all() cho từng selector.
+        Không gộp thành 1 selector "a, b, c" được vì selector rộng ([class*='review'])
+        sẽ khớp cả các element con của review.
+        """
+        page = page or self.page
+        try:
+            index = page.evaluate(FIRST_MATCHING_SELECTOR_JS, list(selectors))
+        except PlaywrightError:
+            return None
+        return selectors[index] if index >= 0 else None
+
+    def _wait_for_toc(self, page_num=None, page=None):
+        """
+        Đợi bảng chapters sẵn sàng thay vì sleep cố định.
+        Nếu truyền page_num (sau khi click phân trang AJAX), đợi thêm đến khi
+        nút trang đang active chuyển sang page_num để không đọc nhầm rows của trang cũ.
+        """
+        page = page or self.page
+        try:
+            page.wait_for_load_state("domcontentloaded", timeout=5000)
+            if page_num is not None:
+                page.wait_for_function(
+                    """n => {
+                        const active = document.querySelector('.pagination-small li.page-active a, .pagination li.page-active a');
+                        return !active || active.innerText.trim() === String(n);
+                    }""",
+                    arg=page_num,
+                    timeout=5000
+                )
+            page.wait_for_selector("table#chapters tbody tr", timeout=5000)
+        except PlaywrightTimeoutError:
+            # Hết thời gian chờ - vẫn tiếp tục đọc những gì đang có trên trang
+            pass
+
+    def _ensure_toc_loaded(self, page=None):
+        """
+        Kích hoạt lazy load bảng chapters chỉ khi cần: nếu chưa có row nào thì scroll xuống
+        và đợi số row tăng lên (wait_for_function) thay vì luôn scroll + sleep 2 giây.
+        """
+        page = page or self.page
+        rows_selector = "table#chapters tbody tr"
+        initial = page.locator(rows_selector).count()
+        if initial > 0:
+            return
         
-        # 6. Làm sạch: xử lý các dòng trống và khoảng trắng thừa
-        lines = text.split('\n')
-        cleaned_lines = []
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        try:
+            page.wait_for_function(
+                "([selector, prev]) => document.querySelectorAll(selector).length > prev",
+                arg=[rows_selector, initial],
+                timeout=5000
+            )
+        except PlaywrightTimeoutError:
+            # Trang không có chapters hoặc load chậm - để caller xử lý kết quả rỗng
+            pass
+
+    def _get_chapters_from_current_page(self, page=None):
+        """
+        Lấy danh sách chapters (không trùng, giữ thứ tự) từ trang hiện tại.
+        Toàn bộ rows được đọc trong 1 lần page.evaluate (URL đã được chuẩn hóa trong browser)
+        thay vì gọi locator/get_attribute cho từng row; trang quá LXML_TOC_THRESHOLD rows
+        thì parse page.content() bằng lxml.
+        """
+        page = page or self.page
         
-        prev_empty = False
-        for line in lines:
-            # Strip cả 2 bên để loại bỏ khoảng trắng thừa (từ HTML indentation)
-            stripped_line = line.strip()
-            
-            # Xử lý dòng trống
-            if not stripped_line:
-                # Chỉ thêm 1 dòng trống giữa các đoạn (không thêm nhiều dòng trống liên tiếp)
-                if not prev_empty:
-                    cleaned_lines.append('')
-                prev_empty = True
+        try:
+            self._ensure_toc_loaded(page)
+            
+            # Trang có rất nhiều rows: lấy HTML đã render 1 lần rồi parse bằng lxml (C) trong process
+            if LXML_AVAILABLE and page.locator("table#chapters tbody tr").count() > LXML_TOC_THRESHOLD:
+                tree = lxml_html.fromstring(page.content())
+                page_urls = [_absolutize(href) for href in CHAPTER_HREFS_XPATH(tree)]
             else:
-                # Giữ nguyên dòng có nội dung (đã strip khoảng trắng thừa)
-                cleaned_lines.append(stripped_line)
-                prev_empty = False
-        
-        # Loại bỏ dòng trống ở đầu và cuối (nhưng giữ dòng trống giữa các đoạn)
-        while cleaned_lines and not cleaned_lines[0].strip():
-            cleaned_lines.pop(0)
-        while cleaned_lines and not cleaned_lines[-1].strip():
-            cleaned_lines.pop()
-        
-        result = '\n'.join(cleaned_lines)
-        
-        # Loại bỏ khoảng trắng thừa ở đầu và cuối toàn bộ text
-        # Nhưng vẫn giữ nguyên cấu trúc bên trong (các dòng trống giữa đoạn)
-        result = result.strip()
-        
-        # Đảm bảo không có khoảng trắng thừa ở đầu mỗi dòng (từ HTML indentation)
-        # Normalize lại để chắc chắn
-        if result:
-            lines = result.split('\n')
-            final_lines = []
-            for line in lines:
-                # Strip từng dòng để loại bỏ khoảng trắng thừa
-                clean_line = line.strip()
-                # Giữ dòng trống nếu là dòng trống thật
-                if not clean_line:
-                    final_lines.append('')
-                else:
-                    final_lines.append(clean_line)
-            result = '\n'.join(final_lines).strip()
+                # Lấy href của link trong cột đầu tiên của mỗi row, chuẩn hóa thành full URL theo BASE_URL
+                page_urls = page.evaluate(
+                    """baseUrl => Array.from(document.querySelectorAll('table#chapters tbody tr'))
+                        .map(row => row.querySelector('td:first-child a'))
+                        .filter(a => a && a.getAttribute('href'))
+                        .map(a => new URL(a.getAttribute('href'), baseUrl + '/').href)""",
+                    config.BASE_URL
+                )
+        except Exception as e:
+            safe_print(f"        ⚠️ Lỗi khi lấy chapters từ trang hiện tại: {e}")
+            return []
         
-        return result
+        # Tránh duplicate: dict giữ thứ tự chèn, bỏ trùng O(1) mỗi URL
+        return list(dict.fromkeys(page_urls))
+
+    def _convert_html_to_formatted_text(self, html_content):
+        """Chuyển HTML sang text giữ định dạng UI (xem convert_html_to_formatted_text)"""
+        return convert_html_to_formatted_text(html_content)
 
     def _scrape_single_chapter(self, url):
         """Hàm con: Chỉ chịu trách nhiệm vào 1 link chương và trả về cục data của chương đó"""
+        # URL không phải trang chương → bỏ qua trước khi goto (tránh chờ hết timeout vô ích)
+        if "/chapter/" not in url:
+            safe_print(f"      ⚠️ Bỏ qua URL không phải chương: {url}")
+            return None
+        
         try:
             self.page.goto(url, timeout=config.TIMEOUT)
             self.page.wait_for_selector(".chapter-inner", timeout=10000)
 
-            title = self.page.locator("h1").first.inner_text()
+            # Lấy title và HTML content trong 1 lần evaluate
+            chapter_fields = self.page.evaluate(CHAPTER_FIELDS_JS)
+            title = chapter_fields["title"]
             
             # Lấy content với định dạng đúng (giữ nguyên xuống dòng như trong UI)
-            content = ""
-            try:
-                content_container = self.page.locator(".chapter-inner").first
-                if content_container.count() > 0:
-                    # Lấy HTML để giữ định dạng
-                    html_content = content_container.inner_html()
-                    # Chuyển HTML sang text với định dạng đúng
-                    content = self._convert_html_to_formatted_text(html_content)
-                else:
-                    # Fallback: dùng inner_text nếu không tìm thấy
-                    content = self.page.locator(".chapter-inner").inner_text()
-            except Exception as e:
-                safe_print(f"      ⚠️ Lỗi khi lấy content: {e}")
-                content = self.page.locator(".chapter-inner").inner_text()
-
-            # Lấy published_time
-            published_time = ""
-            try:
-                time_elem = self.page.locator("time, .timestamp, [class*='time'], [class*='date'], [datetime]").first
-                if time_elem.count() > 0:
-                    published_time = time_elem.get_attribute("datetime") or time_elem.inner_text().strip()
-            except:
-                pass
+            content = self._convert_html_to_formatted_text(chapter_fields["content_html"])
             
             # Lấy chapter_id từ URL (ví dụ: /chapter/123456/ -> 123456)
-            chapter_id = ""
-            try:
-                url_parts = url.split("/chapter/")
-                if len(url_parts) > 1:
-                    chapter_id = url_parts[1].split("/")[0]
-            except:
-                chapter_id = ""
+            chapter_id = utils.extract_chapter_id(url)
             
             # Lấy comments cho chapter này
             safe_print(f"      ... Đang lấy comments cho chương")
@@ -991,15 +2015,8 @@ class RoyalRoadScraper:
             content_hash = utils.hash_content(content)
             current_time = utils.get_current_timestamp()
             
-            # Extract chapter_id từ URL nếu có
-            chapter_id = None
-            try:
-                # URL format: .../chapter/{chapter_id}/{chapter-slug}
-                url_parts = url.split("/chapter/")
-                if len(url_parts) > 1:
-                    chapter_id = url_parts[1].split("/")[0]
-            except:
-                pass
+            # chapter_id đã lấy từ URL ở trên (format: .../chapter/{chapter_id}/{chapter-slug}), None nếu không có
+            chapter_id = chapter_id or None
 
             return {
                 "chapter_id": chapter_id,  # ID từ URL
@@ -1017,79 +2034,222 @@ class RoyalRoadScraper:
             safe_print(f"⚠️ Lỗi cào chương {url}: {e}")
             return None
 
-    def _scrape_single_chapter_worker(self, url, index, story_id):
+    def _scrape_chapters_parallel(self, chapter_urls, story_id):
+        """
+        Cào các chương song song với ThreadPoolExecutor (GIỮ ĐÚNG THỨ TỰ).
+        Mỗi thread launch browser 1 lần rồi lần lượt lấy chương từ queue chung;
+        mỗi chương chỉ tạo context + page mới (rẻ hơn nhiều so với launch lại browser).
+        Trả về list kết quả cố định theo index - mỗi index = 1 chương.
+        """
+        chapter_results = [None] * len(chapter_urls)
+        if not chapter_urls:
+            return chapter_results
+        
+        # Async: 1 browser + 1 event loop mở tối đa max_workers chương cùng lúc, parse bằng lxml
+        if LXML_AVAILABLE and self._chapter_worker_mode == 'async':
+            return self._scrape_chapters_async(chapter_urls, story_id)
+        
+        task_queue = queue.Queue()
+        for index, chap_url in enumerate(chapter_urls):
+            task_queue.put((index, chap_url))
+        
+        num_workers = min(self.max_workers, len(chapter_urls))
+        storage_state = self._get_storage_state()
+        progress = _ProgressPrinter(len(chapter_urls), "chương")
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(self._chapter_browser_worker, task_queue, chapter_results, story_id, worker_index, progress, storage_state)
+                for worker_index in range(num_workers)
+            ]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    safe_print(f"    ❌ Lỗi worker cào chương: {e}")
+        
+        return chapter_results
+
+    def _scrape_chapters_async(self, chapter_urls, story_id):
+        """
+        Cào các chương bằng Playwright async (CHAPTER_WORKER_MODE = "async", cần lxml):
+        _fetch_pages_html_async lấy HTML các chương trên 1 browser (tối đa self.max_workers
+        trang cùng lúc qua asyncio.gather), sau đó parse title/content/comments trong Python.
+        Các trang comments thứ 2 trở đi của MỌI chương được gom lại rồi lấy chung
+        (thay vì lần lượt từng chương). Cả 2 loại trang đều lấy theo đợt ASYNC_FETCH_BATCH_SIZE trang,
+        parse xong đợt này mới lấy đợt sau nên chỉ giữ HTML của 1 đợt trong bộ nhớ.
+        Trả về list kết quả cố định theo index - giống _scrape_chapters_parallel.
+        """
+        chapter_results = [None] * len(chapter_urls)
+        runner = _AsyncBrowserRunner.instance()
+        batch_size = max(ASYNC_FETCH_BATCH_SIZE, self.max_workers)
+        
+        safe_print(f"    🚀 Lấy {len(chapter_urls)} chương (async, tối đa {self.max_workers} trang cùng lúc)...")
+        # Đợt 1: parse chương + comments trang 1, ghi lại các trang comments còn lại của từng chương
+        extra_comment_pages = []  # [(index, chapter_id, page_url)]
+        for start in range(0, len(chapter_urls), batch_size):
+            batch_urls = chapter_urls[start:start + batch_size]
+            fetch_urls = [url for url in batch_urls if "/chapter/" in url]
+            # Event loop riêng của runner (thread khác) nên không đụng Playwright sync ở thread hiện tại
+            html_by_url = dict(zip(fetch_urls, runner.fetch_pages_html(fetch_urls, self.max_workers)))
+            for index, url in enumerate(batch_urls, start):
+                html_content = html_by_url.get(url)
+                if not html_content:
+                    safe_print(f"    ⚠️ Bỏ qua chương {index + 1}: không lấy được trang {url}")
+                    continue
+                try:
+                    chapter_results[index], page_urls = self._parse_chapter_html(url, html_content)
+                    chapter_id = utils.extract_chapter_id(url)
+                    extra_comment_pages.extend((index, chapter_id, page_url) for page_url in page_urls)
+                except Exception as e:
+                    safe_print(f"⚠️ Lỗi cào chương {index + 1}: {e}")
+        
+        # Đợt 2: các trang comments còn lại của cả story (gộp mọi chương), parse và trả về đúng chương
+        if extra_comment_pages:
+            safe_print(f"    🚀 Lấy {len(extra_comment_pages)} trang comments còn lại (async)...")
+            for start in range(0, len(extra_comment_pages), batch_size):
+                batch = extra_comment_pages[start:start + batch_size]
+                html_pages = runner.fetch_pages_html([page_url for _, _, page_url in batch], self.max_workers)
+                for (index, chapter_id, _), html_content in zip(batch, html_pages):
+                    if html_content:
+                        chapter_results[index]["comments"].extend(self._parse_comments_from_html(html_content, chapter_id))
+        
+        # Chương lỗi đã được báo ở trên → chỉ cần 1 dòng tổng kết thay vì 1 dòng mỗi chương
+        done_count = sum(1 for chapter in chapter_results if chapter)
+        safe_print(f"    ✅ Hoàn thành {done_count}/{len(chapter_urls)} chương")
+        
+        return chapter_results
+
+    def _parse_chapter_html(self, url, html_content):
+        """
+        Dựng chapter dict (cùng schema với _scrape_single_chapter_worker) từ HTML trang chương.
+        Comments chỉ gồm trang 1 (parse ngay từ HTML này).
+        Trả về (chapter, page_urls) - page_urls là URL các trang comments còn lại để caller tự lấy.
+        """
+        tree = lxml_html.fromstring(html_content)
+        
+        titles = CHAPTER_TITLE_XPATH(tree)
+        title = titles[0].text_content().strip() if titles else ""
+        
+        # innerHTML của .chapter-inner (giống CHAPTER_FIELDS_JS) để dùng chung _convert_html_to_formatted_text
+        content_html = ""
+        contents = CHAPTER_CONTENT_XPATH(tree)
+        if contents:
+            content_elem = contents[0]
+            content_html = (content_elem.text or "") + "".join(
+                lxml_html.tostring(child, encoding="unicode") for child in content_elem
+            )
+        content = self._convert_html_to_formatted_text(content_html)
+        
+        # Lấy chapter_id từ URL (ví dụ: /chapter/123456/ -> 123456)
+        chapter_id = utils.extract_chapter_id(url)
+        
+        # Số trang comments: data-page của các link phân trang, không có thì lấy từ text
+        pagination = _first_xpath_match(COMMENT_PAGINATION_XPATHS, tree)
+        links = list(pagination.iter("a")) if pagination is not None else []
+        page_numbers = [int(v) for v in (a.get("data-page") or "" for a in links) if v.isdigit()]
+        if not page_numbers:
+            page_numbers = [int(v) for v in (a.text_content().strip() for a in links) if v.isdigit()]
+        max_page = max(page_numbers) if page_numbers else 1
+        
+        chapter_comments = self._parse_comments_from_html(html_content, chapter_id)
+        page_urls = [self._build_comment_page_url(url, page_num) for page_num in range(2, max_page + 1)]
+        
+        content_hash = utils.hash_content(content)
+        current_time = utils.get_current_timestamp()
+        
+        return {
+            "chapter_id": chapter_id or None,  # ID từ URL
+            "url": url,
+            "title": title,
+            "content_text": content,
+            "content_hash": content_hash,  # Hash để detect thay đổi
+            "content_length": len(content),  # Độ dài content
+            "created_at": current_time,
+            "updated_at": current_time,
+            "last_synced_at": None,  # Sẽ được cập nhật bởi sync worker
+            "comments": chapter_comments
+        }, page_urls
+
+    def _chapter_browser_worker(self, task_queue, chapter_results, story_id, worker_index, progress, storage_state=None):
+        """
+        Worker sở hữu 1 browser trong suốt vòng đời thread (Playwright sync không dùng chung
+        được giữa các thread). Lấy (index, url) từ task_queue đến khi hết và ghi kết quả
+        vào đúng vị trí index của chapter_results.
+        progress: _ProgressPrinter dùng chung giữa các worker (in tiến độ theo lô).
+        storage_state: cookies/localStorage của context chính, nạp vào context của mỗi chương.
+        """
+        worker_playwright = None
+        worker_browser = None
+        
+        try:
+            # Tạo browser instance riêng cho worker này (dùng lại cho mọi chương của worker)
+            worker_playwright, worker_browser = _launch_worker_browser()
+            
+            while True:
+                try:
+                    index, url = task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                # LƯU VÀO ĐÚNG VỊ TRÍ INDEX - không phải append!
+                chapter_results[index] = self._scrape_single_chapter_worker(url, index, story_id, worker_browser, storage_state)
+                progress.update(index, chapter_results[index])
+        finally:
+            # Đóng browser của worker
+            if worker_browser:
+                worker_browser.close()
+            if worker_playwright:
+                worker_playwright.stop()
+
+    def _scrape_single_chapter_worker(self, url, index, story_id, worker_browser, storage_state=None):
         """
-        Worker function để cào MỘT chương - mỗi worker có browser instance riêng
-        Thread-safe: Mỗi worker có browser instance riêng
+        Cào MỘT chương bằng browser của worker hiện tại - mỗi chương dùng context + page riêng
+        Thread-safe: worker_browser chỉ được dùng trong thread đã tạo ra nó
         
         Args:
             url: URL của chương cần cào (DUY NHẤT - không trùng lặp)
             index: Thứ tự chương trong list (DUY NHẤT - không trùng lặp)
             story_id: ID của story (FK)
+            worker_browser: Browser của worker (launch 1 lần trong _chapter_browser_worker)
+            storage_state: Session của context chính (self.context.storage_state()), None = context trống
         """
-        worker_playwright = None
-        worker_browser = None
+        # URL không phải trang chương → bỏ qua trước khi mở context và goto
+        if "/chapter/" not in url:
+            safe_print(f"    ⚠️ Thread-{index}: Bỏ qua URL không phải chương: {url}")
+            return None
+        
+        worker_context = None
         
         try:
-            # Delay để stagger các thread - tránh tất cả thread bắt đầu cùng lúc
-            time.sleep(index * config.DELAY_THREAD_START)
-            
-            # Tạo browser instance riêng cho worker này
-            worker_playwright = sync_playwright().start()
-            worker_browser = worker_playwright.chromium.launch(headless=config.HEADLESS)
-            worker_context = worker_browser.new_context()
+            # Context mới cho mỗi chương (cache tách biệt), nạp sẵn session của context chính
+            worker_context = worker_browser.new_context(storage_state=storage_state)
+            _block_heavy_resources(worker_context)
             worker_page = worker_context.new_page()
             
-            safe_print(f"    🔄 Thread-{index}: Đang cào chương {index + 1}")
+            debug_print("    🔄 Thread-%s: Đang cào chương %s", index, index + 1)
             
             # Delay trước khi request để tránh ban IP
             time.sleep(config.DELAY_BETWEEN_REQUESTS)
             
-            # Cào chương
+            # Cào chương - wait_for_selector đã đợi đến khi content sẵn sàng, không cần sleep thêm
             worker_page.goto(url, timeout=config.TIMEOUT)
             worker_page.wait_for_selector(".chapter-inner", timeout=10000)
-            
-            # Delay sau khi load page
-            time.sleep(config.DELAY_BETWEEN_REQUESTS)
 
-            title = worker_page.locator("h1").first.inner_text()
-            
-            # Lấy published_time
-            published_time = ""
-            try:
-                time_elem = worker_page.locator("time, .timestamp, [class*='time'], [class*='date'], [datetime]").first
-                if time_elem.count() > 0:
-                    published_time = time_elem.get_attribute("datetime") or time_elem.inner_text().strip()
-            except:
-                pass
+            # Lấy title và HTML content trong 1 lần evaluate
+            chapter_fields = worker_page.evaluate(CHAPTER_FIELDS_JS)
+            title = chapter_fields["title"]
             
             # Lấy content với định dạng đúng
-            content = ""
-            try:
-                content_container = worker_page.locator(".chapter-inner").first
-                if content_container.count() > 0:
-                    html_content = content_container.inner_html()
-                    content = self._convert_html_to_formatted_text(html_content)
-                else:
-                    content = worker_page.locator(".chapter-inner").inner_text()
-            except Exception as e:
-                safe_print(f"      ⚠️ Thread-{index}: Lỗi khi lấy content: {e}")
-                content = worker_page.locator(".chapter-inner").inner_text()
+            content = self._convert_html_to_formatted_text(chapter_fields["content_html"])
 
             # Delay trước khi lấy comments
             time.sleep(config.DELAY_BETWEEN_REQUESTS)
             
             # Lấy chapter_id từ URL (ví dụ: /chapter/123456/ -> 123456)
-            chapter_id = ""
-            try:
-                url_parts = url.split("/chapter/")
-                if len(url_parts) > 1:
-                    chapter_id = url_parts[1].split("/")[0]
-            except:
-                chapter_id = ""
+            chapter_id = utils.extract_chapter_id(url)
             
             # Lấy comments cho chapter này (cần chapter_id để thêm vào mỗi comment)
-            safe_print(f"      💬 Thread-{index}: Đang lấy comments cho chương")
+            debug_print("      💬 Thread-%s: Đang lấy comments cho chương", index)
             chapter_comments = self._scrape_comments_worker(worker_page, url, "chapter", chapter_id)
 
             # Delay sau khi hoàn thành chương
@@ -1099,15 +2259,8 @@ class RoyalRoadScraper:
             content_hash = utils.hash_content(content)
             current_time = utils.get_current_timestamp()
             
-            # Extract chapter_id từ URL nếu có
-            chapter_id = None
-            try:
-                # URL format: .../chapter/{chapter_id}/{chapter-slug}
-                url_parts = url.split("/chapter/")
-                if len(url_parts) > 1:
-                    chapter_id = url_parts[1].split("/")[0]
-            except:
-                pass
+            # chapter_id đã lấy từ URL ở trên (format: .../chapter/{chapter_id}/{chapter-slug}), None nếu không có
+            chapter_id = chapter_id or None
 
             return {
                 "chapter_id": chapter_id,  # ID từ URL
@@ -1131,74 +2284,41 @@ class RoyalRoadScraper:
             safe_print(f"⚠️ Thread-{index}: Lỗi cào chương {index + 1}: {e}")
             return None
         finally:
-            # Đóng browser của worker
-            if worker_browser:
-                worker_browser.close()
-            if worker_playwright:
-                worker_playwright.stop()
+            # Chỉ đóng context của chương này, browser được worker dùng lại
+            if worker_context:
+                worker_context.close()
 
-    def _get_max_comment_page(self, url):
-        """Lấy số trang comments tối đa từ pagination"""
+    def _get_max_comment_page(self, url, page=None):
+        """Lấy số trang comments tối đa từ pagination (page mặc định là self.page)"""
+        page = page or self.page
         try:
             # Đảm bảo đang ở đúng trang (trang 1 - không có query comments)
-            base_url = url.split('?')[0]
-            current_url = self.page.url.split('?')[0]
+            base_url = url.partition('?')[0]
+            current_url = page.url.partition('?')[0]
             
             if base_url not in current_url:
-                self.page.goto(base_url, timeout=config.TIMEOUT)
-                time.sleep(2)
+                page.goto(base_url, timeout=config.TIMEOUT)
+                self._wait_for_attached(CHAPTER_PAGE_READY_SELECTOR, page)
             
             # Scroll xuống để load pagination
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
+            self._scroll_and_wait(COMMENT_PAGINATION_READY_SELECTOR, page)
             
             max_page = 1  # Mặc định là 1 trang
             
             # Tìm pagination element - có thể trong .chapter-nav hoặc trực tiếp
-            pagination_selectors = [
-                "ul.pagination",
-                ".chapter-nav ul.pagination",
-                ".pagination"
-            ]
-            
-            pagination = None
-            for selector in pagination_selectors:
-                try:
-                    pagination = self.page.locator(selector).first
-                    if pagination.count() > 0:
-                        break
-                except:
-                    continue
-            
-            if pagination and pagination.count() > 0:
-                # Lấy tất cả các link có data-page attribute
-                page_links = pagination.locator("a[data-page]").all()
-                
-                page_numbers = []
-                for link in page_links:
-                    try:
-                        page_num_str = link.get_attribute("data-page")
-                        if page_num_str:
-                            page_num = int(page_num_str)
-                            page_numbers.append(page_num)
-                    except:
-                        continue
-                
-                # Cũng thử lấy từ text content (nếu không có data-page)
-                if not page_numbers:
-                    try:
-                        all_links = pagination.locator("a").all()
-                        for link in all_links:
-                            try:
-                                link_text = link.inner_text().strip()
-                                # Thử parse số từ text (ví dụ: "31", "Next >" sẽ bị skip)
-                                if link_text.isdigit():
-                                    page_num = int(link_text)
-                                    page_numbers.append(page_num)
-                            except:
-                                continue
-                    except:
-                        pass
+            pagination = self._find_pagination("comments", COMMENT_PAGINATION_SELECTORS, page)
+            
+            if pagination:
+                # Lấy số trang từ data-page của các link trong 1 lần evaluate;
+                # nếu không link nào có data-page thì parse số từ text ("31", bỏ qua "Next >")
+                page_numbers = pagination.evaluate(
+                    """el => {
+                        const links = Array.from(el.querySelectorAll('a'));
+                        const numbers = values => values.filter(v => /^\\d+$/.test(v)).map(Number);
+                        const fromData = numbers(links.map(a => a.getAttribute('data-page') || ''));
+                        return fromData.length ? fromData : numbers(links.map(a => a.innerText.trim()));
+                    }"""
+                )
                 
                 if page_numbers:
                     max_page = max(page_numbers)
@@ -1212,20 +2332,24 @@ class RoyalRoadScraper:
             safe_print(f"        ⚠️ Lỗi khi lấy số trang: {e}")
             return 1  # Nếu lỗi, mặc định chỉ có 1 trang
 
-    def _scrape_comments_from_page(self, page_url, chapter_id=""):
-        """Lấy comments từ một trang cụ thể, trả về danh sách phẳng (flat)"""
+    def _scrape_comments_from_page(self, page_url, chapter_id="", page=None):
+        """Lấy comments từ một trang cụ thể, trả về danh sách phẳng (flat) (page mặc định là self.page)"""
+        page = page or self.page
         comments = []
         
         try:
-            self.page.goto(page_url, timeout=config.TIMEOUT)
-            time.sleep(2)  # Chờ page load
+            page.goto(page_url, timeout=config.TIMEOUT)
+            self._wait_for_attached(CHAPTER_PAGE_READY_SELECTOR, page)  # Chờ page load
             
             # Scroll xuống để load comments (lazy load)
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
+            self._scroll_and_wait(COMMENTS_READY_SELECTOR, page)
+            
+            # Có lxml: lấy HTML 1 lần rồi parse toàn bộ comments trong Python
+            if LXML_AVAILABLE:
+                return self._parse_comments_from_html(page.content(), chapter_id)
             
             # Lấy tất cả div.comment và filter những cái không nằm trong ul.subcomments
-            all_comments = self.page.locator("div.comment").all()
+            all_comments = page.locator("div.comment").all()
             
             for comment_elem in all_comments:
                 try:
@@ -1270,7 +2394,7 @@ class RoyalRoadScraper:
             current_url = self.page.url
             if url not in current_url:
                 self.page.goto(url, timeout=config.TIMEOUT)
-                time.sleep(2)
+                self._wait_for_attached(CHAPTER_PAGE_READY_SELECTOR)
             
             safe_print(f"      💬 Đang lấy comments ({comment_type}-level)...")
             
@@ -1280,43 +2404,30 @@ class RoyalRoadScraper:
             all_comments = []
             
             # Bước 2: Lấy comments từ tất cả các trang
-            for page_num in range(1, max_page + 1):
-                safe_print(f"        📄 Đang lấy trang {page_num}/{max_page}...")
+            # Nhiều trang: trang 1 lấy trên page hiện tại, các trang còn lại chia cho nhiều browser song song
+            max_comment_workers = self._max_comment_workers
+            last_sequential_page = 1 if max_comment_workers > 1 and max_page > 2 else max_page
+            
+            for page_num in range(1, last_sequential_page + 1):
+                debug_print("        📄 Đang lấy trang %s/%s...", page_num, max_page)
                 
                 # Tạo URL cho trang này
-                if page_num == 1:
-                    # Trang 1: Loại bỏ query parameter comments nếu có
-                    base_url = url.split('?')[0]  # Lấy URL gốc không có query
-                    page_url = base_url
-                else:
-                    # Trang khác: Thêm query parameter comments=N
-                    base_url = url.split('?')[0]  # Lấy URL gốc
-                    # Tìm các query parameter hiện có (trừ comments)
-                    if '?' in url:
-                        existing_params = url.split('?', 1)[1]
-                        # Loại bỏ comments parameter nếu có
-                        params_list = []
-                        for param in existing_params.split('&'):
-                            if not param.startswith('comments='):
-                                params_list.append(param)
-                        if params_list:
-                            other_params = '&'.join(params_list)
-                            page_url = f"{base_url}?{other_params}&comments={page_num}"
-                        else:
-                            page_url = f"{base_url}?comments={page_num}"
-                    else:
-                        page_url = f"{base_url}?comments={page_num}"
+                page_url = self._build_comment_page_url(url, page_num)
                 
                 # Lấy comments từ trang này
                 page_comments = self._scrape_comments_from_page(page_url, chapter_id)
                 all_comments.extend(page_comments)
                 
-                safe_print(f"        ✅ Trang {page_num}: Lấy được {len(page_comments)} comments")
+                debug_print("        ✅ Trang %s: Lấy được %s comments", page_num, len(page_comments))
                 
                 # Delay giữa các trang để tránh bị ban
                 if page_num < max_page:
                     time.sleep(1)
             
+            if last_sequential_page < max_page:
+                page_urls = [self._build_comment_page_url(url, page_num) for page_num in range(last_sequential_page + 1, max_page + 1)]
+                all_comments.extend(self._get_comment_pages_parallel(page_urls, chapter_id, max_comment_workers))
+            
             safe_print(f"      ✅ Tổng cộng lấy được {len(all_comments)} comments từ {max_page} trang ({comment_type}-level)")
             return all_comments
             
@@ -1324,6 +2435,93 @@ class RoyalRoadScraper:
             safe_print(f"      ⚠️ Lỗi khi lấy comments: {e}")
             return []
 
+    def _build_comment_page_url(self, url, page_num):
+        """
+        Tạo URL cho trang comments thứ page_num.
+        Trang 1: URL gốc không có query. Trang khác: giữ các query parameter hiện có (trừ comments) và thêm comments=N
+        """
+        base_url, _, existing_params = url.partition('?')
+        if page_num == 1:
+            return base_url
+        
+        if existing_params:
+            # Loại bỏ comments parameter nếu có
+            params_list = [param for param in existing_params.split('&') if not param.startswith('comments=')]
+            if params_list:
+                return f"{base_url}?{'&'.join(params_list)}&comments={page_num}"
+        return f"{base_url}?comments={page_num}"
+
+    def _get_comment_pages_parallel(self, page_urls, chapter_id, max_workers):
+        """
+        Lấy comments từ nhiều trang song song.
+        Có lxml: dùng Playwright async (_fetch_pages_html_async) - 1 browser, mỗi trang 1 context.
+        Không có lxml: ThreadPoolExecutor, mỗi worker có browser riêng và lần lượt lấy một đoạn trang liên tiếp.
+        Trả về danh sách comments phẳng theo đúng thứ tự trang.
+        """
+        # Có lxml: 1 browser async mở nhiều trang đồng thời, chỉ lấy HTML rồi parse trong Python
+        if LXML_AVAILABLE:
+            safe_print(f"        🚀 Lấy {len(page_urls)} trang comments còn lại (async, tối đa {max_workers} trang cùng lúc)...")
+            # Event loop riêng của runner (thread khác) nên không đụng Playwright sync ở thread hiện tại
+            html_pages = _AsyncBrowserRunner.instance().fetch_pages_html(page_urls, max_workers)
+            comments = []
+            for html_content in html_pages:
+                if html_content:
+                    comments.extend(self._parse_comments_from_html(html_content, chapter_id))
+            return comments
+        
+        num_workers = min(max_workers, len(page_urls))
+        chunk_size = -(-len(page_urls) // num_workers)  # Chia lấy trần
+        chunks = [page_urls[i:i + chunk_size] for i in range(0, len(page_urls), chunk_size)]
+        
+        safe_print(f"        🚀 Lấy {len(page_urls)} trang comments còn lại với {len(chunks)} workers song song...")
+        
+        page_results = {}
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [
+                executor.submit(self._get_comment_pages_worker, chunk, chapter_id, index)
+                for index, chunk in enumerate(chunks)
+            ]
+            for future in as_completed(futures):
+                try:
+                    page_results.update(future.result())
+                except Exception as e:
+                    safe_print(f"        ❌ Lỗi khi lấy trang comments song song: {e}")
+        
+        comments = []
+        for page_url in page_urls:
+            comments.extend(page_results.get(page_url, []))
+        return comments
+
+    def _get_comment_pages_worker(self, page_urls, chapter_id, index):
+        """
+        Worker lấy comments từ một đoạn trang - mỗi worker có browser instance riêng
+        Trả về dict {page_url: [comments]}
+        """
+        worker_playwright = None
+        worker_browser = None
+        results = {}
+        
+        try:
+            worker_playwright, worker_browser = _launch_worker_browser()
+            worker_context = worker_browser.new_context()
+            _block_heavy_resources(worker_context)
+            worker_page = worker_context.new_page()
+            
+            for page_url in page_urls:
+                results[page_url] = self._scrape_comments_from_page_worker(worker_page, page_url, chapter_id)
+                debug_print("        ✅ Comment-Worker-%s: Lấy được %s comments từ %s", index, len(results[page_url]), page_url)
+            
+            return results
+            
+        except Exception as e:
+            safe_print(f"        ⚠️ Comment-Worker-{index}: Lỗi khi lấy comments: {e}")
+            return results
+        finally:
+            if worker_browser:
+                worker_browser.close()
+            if worker_playwright:
+                worker_playwright.stop()
+
     def _scrape_comments_worker(self, page, url, comment_type="chapter", chapter_id=""):
         """
         Worker function để lấy comments - dùng page từ worker thay vì self.page
@@ -1334,7 +2532,7 @@ class RoyalRoadScraper:
                 # Delay trước khi request comments
                 time.sleep(config.DELAY_BETWEEN_REQUESTS)
                 page.goto(url, timeout=config.TIMEOUT)
-                time.sleep(2)
+                self._wait_for_attached(CHAPTER_PAGE_READY_SELECTOR, page)
             
             safe_print(f"      💬 Đang lấy comments ({comment_type}-level)...")
             
@@ -1348,27 +2546,10 @@ class RoyalRoadScraper:
             
             # Lấy comments từ tất cả các trang
             for page_num in range(1, max_page + 1):
-                safe_print(f"        📄 Đang lấy trang {page_num}/{max_page}...")
+                debug_print("        📄 Đang lấy trang %s/%s...", page_num, max_page)
                 
                 # Tạo URL cho trang này
-                if page_num == 1:
-                    base_url = url.split('?')[0]
-                    page_url = base_url
-                else:
-                    base_url = url.split('?')[0]
-                    if '?' in url:
-                        existing_params = url.split('?', 1)[1]
-                        params_list = []
-                        for param in existing_params.split('&'):
-                            if not param.startswith('comments='):
-                                params_list.append(param)
-                        if params_list:
-                            other_params = '&'.join(params_list)
-                            page_url = f"{base_url}?{other_params}&comments={page_num}"
-                        else:
-                            page_url = f"{base_url}?comments={page_num}"
-                    else:
-                        page_url = f"{base_url}?comments={page_num}"
+                page_url = self._build_comment_page_url(url, page_num)
                 
                 # Delay trước khi request trang comments
                 if page_num > 1:
@@ -1378,7 +2559,7 @@ class RoyalRoadScraper:
                 page_comments = self._scrape_comments_from_page_worker(page, page_url, chapter_id)
                 all_comments.extend(page_comments)
                 
-                safe_print(f"        ✅ Trang {page_num}: Lấy được {len(page_comments)} comments")
+                debug_print("        ✅ Trang %s: Lấy được %s comments", page_num, len(page_comments))
                 
                 # Delay giữa các trang comments
                 if page_num < max_page:
@@ -1393,113 +2574,127 @@ class RoyalRoadScraper:
 
     def _get_max_comment_page_worker(self, page, url):
         """Lấy số trang comments tối đa từ pagination - dùng page từ worker"""
-        try:
-            base_url = url.split('?')[0]
-            current_url = page.url.split('?')[0]
-            
-            if base_url not in current_url:
-                page.goto(base_url, timeout=config.TIMEOUT)
-                time.sleep(2)
-            
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
-            
-            max_page = 1
-            
-            pagination_selectors = [
-                "ul.pagination",
-                ".chapter-nav ul.pagination",
-                ".pagination"
-            ]
-            
-            pagination = None
-            for selector in pagination_selectors:
-                try:
-                    pagination = page.locator(selector).first
-                    if pagination.count() > 0:
-                        break
-                except:
-                    continue
-            
-            if pagination and pagination.count() > 0:
-                page_links = pagination.locator("a[data-page]").all()
-                
-                page_numbers = []
-                for link in page_links:
-                    try:
-                        page_num_str = link.get_attribute("data-page")
-                        if page_num_str:
-                            page_num = int(page_num_str)
-                            page_numbers.append(page_num)
-                    except:
-                        continue
-                
-                if not page_numbers:
-                    try:
-                        all_links = pagination.locator("a").all()
-                        for link in all_links:
-                            try:
-                                link_text = link.inner_text().strip()
-                                if link_text.isdigit():
-                                    page_num = int(link_text)
-                                    page_numbers.append(page_num)
-                            except:
-                                continue
-                    except:
-                        pass
-                
-                if page_numbers:
-                    max_page = max(page_numbers)
-            
-            return max_page
-        except Exception as e:
-            safe_print(f"        ⚠️ Lỗi khi lấy số trang: {e}")
-            return 1
+        return self._get_max_comment_page(url, page)
 
     def _scrape_comments_from_page_worker(self, page, page_url, chapter_id=""):
         """Lấy comments từ một trang cụ thể - dùng page từ worker, trả về danh sách phẳng"""
+        # Delay trước khi request
+        time.sleep(config.DELAY_BETWEEN_REQUESTS)
+        return self._scrape_comments_from_page(page_url, chapter_id, page)
+
+    def _clean_comment_body_text(self, full_text, username):
+        """
+        Lấy nội dung comment từ toàn bộ text của media-body (khi comment không có thẻ <p>):
+        bỏ username ở đầu và các dòng không phải nội dung (timestamp, rep count, Reply/Report)
+        """
+        full_text = full_text.strip()
+        
+        # Loại bỏ username nếu có ở đầu
+        if username and full_text.startswith(username):
+            comment_text = full_text[len(username):].strip()
+        else:
+            comment_text = full_text
+        
+        # Loại bỏ các phần không phải nội dung (như timestamp, rep count)
+        # Các phần này thường ở cuối, có thể có format như "7 years ago" hoặc "Rep (63)"
+        cleaned_lines = []
+        for line in comment_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            # Bỏ qua dòng chứa "years ago", "Rep (", "Reply", "Report"
+            if any(x in line.lower() for x in ['years ago', 'months ago', 'days ago', 'hours ago', 
+                                                'rep (', 'reply', 'report']):
+                continue
+            cleaned_lines.append(line)
+        return '\n'.join(cleaned_lines).strip()
+
+    def _parse_comments_from_html(self, html_content, chapter_id=""):
+        """
+        Parse toàn bộ comments của trang từ HTML (page.content()) bằng lxml, trả về danh sách phẳng.
+        Cùng logic với _scrape_single_comment_recursive nhưng chạy trong Python,
+        không tốn round trip sang browser cho mỗi field của mỗi comment.
+        """
+        tree = lxml_html.fromstring(html_content)
         comments = []
+        # Chỉ lấy comment gốc (không nằm trong ul.subcomments), replies được lấy đệ quy
+        for comment_elem in TOP_COMMENTS_XPATH(tree):
+            comments.extend(self._parse_comment_tree_lxml(comment_elem, chapter_id, parent_id=None))
+        return comments
+
+    def _parse_comment_tree_lxml(self, comment_elem, chapter_id="", parent_id=None):
+        """Bản lxml của _scrape_single_comment_recursive: 1 comment + tất cả replies (flatten)"""
+        media_elems = COMMENT_MEDIA_XPATH(comment_elem)
+        if not media_elems:
+            return []
+        media_elem = media_elems[0]
+        
+        # Lấy comment ID từ id attribute
+        comment_id = media_elem.get("id") or ""
+        if comment_id.startswith("comment-container-"):
+            comment_id = comment_id.replace("comment-container-", "")
+        
+        # Lấy username và user_id từ link profile
+        user_id = ""
+        username = ""
+        username_elem = _first_xpath_match(COMMENT_USERNAME_XPATHS, media_elem)
+        if username_elem is not None:
+            username = username_elem.text_content().strip()
+            user_id = _extract_profile_id(username_elem.get("href") or "")
+        if not username:
+            username = "[Unknown]"
+        
+        # Lấy comment text - ưu tiên các đoạn <p> để giữ format
+        comment_text = ""
+        media_bodies = COMMENT_BODY_XPATH(media_elem)
+        if media_bodies:
+            # text_content()/itertext() bỏ qua <br>, còn inner_text (bản Playwright) đổi <br> thành "\n"
+            # → thêm "\n" vào tail của mỗi <br> để 2 cách parse cho cùng 1 chuỗi
+            for br in media_bodies[0].iter("br"):
+                br.tail = "\n" + (br.tail or "")
+            paragraphs = media_bodies[0].findall(".//p")
+            if paragraphs:
+                text_parts = [para.text_content().strip() for para in paragraphs]
+                comment_text = "\n\n".join(part for part in text_parts if part)
+            else:
+                comment_text = self._clean_comment_body_text("\n".join(media_bodies[0].itertext()), username)
+        
+        # Lấy timestamp
+        timestamp = ""
+        time_elems = COMMENT_TIME_XPATH(media_elem)
+        if time_elems:
+            timestamp = time_elems[0].get("datetime") or time_elems[0].text_content().strip()
+        
+        # Tạo cấu trúc comment theo schema (flat structure)
+        comment_data = {
+            "comment_id": comment_id,  # Schema: comment id
+            "comment_text": comment_text,  # Schema: comment text
+            "time": timestamp,  # Schema: time
+            "chapter_id": chapter_id,  # Schema: chapter id (FK)
+            "parent_id": parent_id,  # Schema: parent id (recursive FK, None nếu là comment gốc)
+            "user_id": user_id  # Schema: user id (FK)
+        }
         
-        try:
-            # Delay trước khi request
-            time.sleep(config.DELAY_BETWEEN_REQUESTS)
-            page.goto(page_url, timeout=config.TIMEOUT)
-            time.sleep(2)
-            
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
-            
-            all_comments = page.locator("div.comment").all()
-            
-            for comment_elem in all_comments:
-                try:
-                    is_in_subcomments = comment_elem.evaluate("""
-                        el => {
-                            let parent = el.parentElement;
-                            while (parent) {
-                                if (parent.tagName === 'UL' && parent.classList.contains('subcomments')) {
-                                    return true;
-                                }
-                                parent = parent.parentElement;
-                            }
-                            return false;
-                        }
-                    """)
-                    
-                    if is_in_subcomments:
-                        continue
-                    
-                    comment_list = self._scrape_single_comment_recursive(comment_elem, chapter_id, parent_id=None)
-                    if comment_list:
-                        comments.extend(comment_list)
-                except Exception as e:
+        # Lưu user nếu có user_id và username
+        if user_id and username:
+            self._save_user_to_mongo(user_id, username)
+        
+        # Lưu comment ngay vào MongoDB (từ cấp thấp nhất)
+        self._save_comment_to_mongo(comment_data)
+        
+        result_list = [comment_data]
+        
+        # Lấy replies trực tiếp trong ul.subcomments đầu tiên - ĐỆ QUY (flatten)
+        subcomments_lists = COMMENT_SUBCOMMENTS_XPATH(comment_elem)
+        if subcomments_lists:
+            subcomments_list = subcomments_lists[0]
+            for reply_elem in COMMENT_DIVS_XPATH(subcomments_list):
+                # Reply của các cấp sâu hơn sẽ được lấy khi đệ quy vào comment cha của nó
+                if NEAREST_SUBCOMMENTS_XPATH(reply_elem)[0] is not subcomments_list:
                     continue
-            
-            return comments
-            
-        except Exception as e:
-            safe_print(f"        ⚠️ Lỗi khi lấy comments từ trang: {e}")
-            return []
+                result_list.extend(self._parse_comment_tree_lxml(reply_elem, chapter_id, parent_id=comment_id))
+        
+        return result_list
 
     def _scrape_single_comment_recursive(self, comment_elem, chapter_id="", parent_id=None):
         """
@@ -1524,44 +2719,16 @@ class RoyalRoadScraper:
             username = ""
             try:
                 # Cấu trúc: h4.media-heading > span.name > a[href*='/profile/']
-                username_selectors = [
-                    "h4.media-heading span.name a",
-                    "h4.media-heading .name a",
-                    ".media-heading span.name a",
-                    ".media-heading .name a[href*='/profile/']",
-                    "h4.media-heading a[href*='/profile/']",
-                    ".media-heading a[href*='/profile/']"
-                ]
-                
-                for selector in username_selectors:
-                    try:
-                        username_elem = media_elem.locator(selector).first
-                        if username_elem.count() > 0:
-                            username = username_elem.inner_text().strip()
-                            # Lấy user_id từ href
-                            href = username_elem.get_attribute("href") or ""
-                            if "/profile/" in href:
-                                user_id = href.split("/profile/")[1].split("/")[0] if "/profile/" in href else ""
-                            if username:
-                                break
-                    except:
-                        continue
-                
-                # Nếu vẫn không tìm thấy, thử lấy từ bất kỳ link profile nào trong media-heading
-                if not username:
-                    try:
-                        username_elem = media_elem.locator(".media-heading a[href*='/profile/']").first
-                        if username_elem.count() > 0:
-                            username = username_elem.inner_text().strip()
-                            href = username_elem.get_attribute("href") or ""
-                            if "/profile/" in href:
-                                user_id = href.split("/profile/")[1].split("/")[0] if "/profile/" in href else ""
-                    except:
-                        pass
-                        
-                if not username:
-                    username = "[Unknown]"
-            except:
+                # Thử các selector theo thứ tự ưu tiên trong 1 lần gọi sang browser
+                username_link = media_elem.evaluate(COMMENT_USERNAME_JS, list(COMMENT_USERNAME_SELECTORS))
+                if username_link:
+                    username, href = username_link
+                    # Lấy user_id từ href
+                    user_id = _extract_profile_id(href)
+            except PlaywrightError:
+                pass
+            
+            if not username:
                 username = "[Unknown]"
             
             # Lấy comment text/content - lấy tất cả các đoạn văn để giữ format
@@ -1578,46 +2745,25 @@ class RoyalRoadScraper:
                         for para in paragraphs:
                             try:
                                 para_text = para.inner_text().strip()
-                                if para_text:
-                                    text_parts.append(para_text)
-                            except:
+                            except PlaywrightError:
                                 continue
+                            if para_text:
+                                text_parts.append(para_text)
                         comment_text = "\n\n".join(text_parts)
                     else:
                         # Nếu không có thẻ p, lấy toàn bộ text từ media-body
-                        full_text = media_body.inner_text().strip()
-                        
-                        # Loại bỏ username nếu có ở đầu
-                        if username and full_text.startswith(username):
-                            comment_text = full_text[len(username):].strip()
-                        else:
-                            comment_text = full_text
-                        
-                        # Loại bỏ các phần không phải nội dung (như timestamp, rep count)
-                        # Các phần này thường ở cuối, có thể có format như "7 years ago" hoặc "Rep (63)"
-                        lines = comment_text.split('\n')
-                        cleaned_lines = []
-                        for line in lines:
-                            line = line.strip()
-                            if not line:
-                                continue
-                            # Bỏ qua dòng chứa "years ago", "Rep (", "Reply", "Report"
-                            if any(x in line.lower() for x in ['years ago', 'months ago', 'days ago', 'hours ago', 
-                                                                'rep (', 'reply', 'report']):
-                                continue
-                            cleaned_lines.append(line)
-                        comment_text = '\n'.join(cleaned_lines).strip()
-            except Exception as e:
+                        comment_text = self._clean_comment_body_text(media_body.inner_text(), username)
+            except PlaywrightError:
                 comment_text = ""
             
             # Lấy timestamp
             timestamp = ""
-            try:
-                time_elem = media_elem.locator("time, .timestamp, [class*='time'], [class*='date']").first
-                if time_elem.count() > 0:
+            time_elem = media_elem.locator("time, .timestamp, [class*='time'], [class*='date']").first
+            if time_elem.count() > 0:
+                try:
                     timestamp = time_elem.get_attribute("datetime") or time_elem.inner_text().strip()
-            except:
-                pass
+                except PlaywrightError:
+                    pass
             
             # Tạo cấu trúc comment theo schema (flat structure)
             comment_data = {
@@ -1651,8 +2797,8 @@ class RoyalRoadScraper:
                         reply_list = self._scrape_single_comment_recursive(reply_elem, chapter_id, parent_id=comment_id)
                         if reply_list:
                             result_list.extend(reply_list)
-            except Exception as e:
-                # Không có replies hoặc lỗi khi lấy
+            except PlaywrightError:
+                # Lỗi khi lấy replies (element bị detach)
                 pass
             
             return result_list
@@ -1670,34 +2816,20 @@ class RoyalRoadScraper:
         try:
             safe_print("      📝 Đang lấy reviews từ trang story...")
             
-            # Đảm bảo đang ở trang story
-            self.page.goto(story_url, timeout=config.TIMEOUT)
-            time.sleep(2)
-            
-            # Scroll xuống để load reviews section
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
+            # Đảm bảo đang ở trang story (scrape_story đã mở sẵn thì không load lại)
+            if self._goto_if_needed(story_url):
+                self._wait_for_attached(STORY_PAGE_READY_SELECTOR)
             
             # Tìm reviews section - có thể là tab "Reviews" hoặc section riêng
             # Thử tìm các selector phổ biến cho reviews
-            review_selectors = [
-                ".review",
-                ".review-item",
-                ".review-container",
-                "[class*='review']",
-                ".rating-review"
-            ]
-            
             review_elements = []
-            for selector in review_selectors:
-                try:
-                    elements = self.page.locator(selector).all()
-                    if elements:
-                        review_elements = elements
-                        safe_print(f"      ✅ Tìm thấy {len(elements)} reviews với selector: {selector}")
-                        break
-                except:
-                    continue
+            selector = self._first_matching_selector(REVIEW_SELECTORS)
+            if selector is None and self._scroll_and_wait(", ".join(REVIEW_SELECTORS)):
+                # Chưa có review nào → scroll để kích hoạt lazy load reviews section rồi dò lại
+                selector = self._first_matching_selector(REVIEW_SELECTORS)
+            if selector:
+                review_elements = self.page.locator(selector).all()
+                safe_print(f"      ✅ Tìm thấy {len(review_elements)} reviews với selector: {selector}")
             
             # Nếu không tìm thấy với selector thông thường, thử tìm trong tabs
             if not review_elements:
@@ -1706,16 +2838,12 @@ class RoyalRoadScraper:
                     reviews_tab = self.page.locator("a[href*='reviews'], button:has-text('Reviews'), .nav-tabs a:has-text('Reviews')").first
                     if reviews_tab.count() > 0:
                         reviews_tab.click()
-                        time.sleep(3)
+                        # Đợi review đầu tiên xuất hiện thay vì sleep cố định
+                        self._wait_for_attached(", ".join(REVIEW_SELECTORS))
                         # Thử lại với các selector
-                        for selector in review_selectors:
-                            try:
-                                elements = self.page.locator(selector).all()
-                                if elements:
-                                    review_elements = elements
-                                    break
-                            except:
-                                continue
+                        selector = self._first_matching_selector(REVIEW_SELECTORS)
+                        if selector:
+                            review_elements = self.page.locator(selector).all()
                 except:
                     pass
             
@@ -1744,95 +2872,37 @@ class RoyalRoadScraper:
         Schema: review id, title, time, content, user id (FK), chapter id (FK), story id (FK), score id (FK)
         """
         try:
+            # Lấy tất cả các field của review trong 1 lần evaluate (theo REVIEW_FIELDS)
+            fields = review_elem.evaluate(REVIEW_FIELDS_JS, [REVIEW_FIELDS, REVIEW_SCORE_SELECTOR])
+            
             # Lấy review ID
-            review_id = ""
-            try:
-                review_id = review_elem.get_attribute("id") or review_elem.get_attribute("data-id") or ""
-                if review_id.startswith("review-"):
-                    review_id = review_id.replace("review-", "")
-            except:
-                pass
+            review_id = fields["review_id"]
+            if review_id.startswith("review-"):
+                review_id = review_id.replace("review-", "")
             
-            # Lấy title
-            title = ""
-            try:
-                title_elem = review_elem.locator("h3, h4, .review-title, [class*='title']").first
-                if title_elem.count() > 0:
-                    title = title_elem.inner_text().strip()
-            except:
-                pass
+            title = fields["title"]
+            time_str = fields["time"]
+            content = fields["content"]
+            username = fields["username"]
             
             # Lấy user_id từ profile URL
-            user_id = ""
-            try:
-                username_elem = review_elem.locator("a[href*='/profile/'], .username, .reviewer-name, [class*='username']").first
-                if username_elem.count() > 0:
-                    href = username_elem.get_attribute("href") or ""
-                    if "/profile/" in href:
-                        user_id = href.split("/profile/")[1].split("/")[0] if "/profile/" in href else ""
-            except:
-                pass
+            user_id = _extract_profile_id(fields["user_href"])
             
             # Lấy chapter_id từ chapter link
-            chapter_id = ""
-            try:
-                chapter_elem = review_elem.locator("a[href*='/chapter/'], .chapter-link, [class*='chapter']").first
-                if chapter_elem.count() > 0:
-                    href = chapter_elem.get_attribute("href") or ""
-                    if "/chapter/" in href:
-                        chapter_id = href.split("/chapter/")[1].split("/")[0]
-            except:
-                pass
-            
-            # Lấy time
-            time_str = ""
-            try:
-                time_elem = review_elem.locator("time, .timestamp, [class*='time'], [class*='date']").first
-                if time_elem.count() > 0:
-                    time_str = time_elem.get_attribute("datetime") or time_elem.inner_text().strip()
-            except:
-                pass
-            
-            # Lấy content
-            content = ""
-            try:
-                content_elem = review_elem.locator(".review-content, .review-text, [class*='content'], [class*='text']").first
-                if content_elem.count() > 0:
-                    content = content_elem.inner_text().strip()
-            except:
-                pass
+            chapter_id = utils.extract_chapter_id(fields["chapter_href"])
             
             # Lấy scores để tạo score_id (tạo unique ID từ scores)
-            scores = {
-                "overall_score": "",
-                "style_score": "",
-                "story_score": "",
-                "grammar_score": "",
-                "character_score": ""
-            }
-            
-            try:
-                # Tìm các score elements
-                score_elements = review_elem.locator(".score, .rating, [class*='score'], [class*='rating']").all()
-                for score_elem in score_elements:
-                    try:
-                        score_text = score_elem.inner_text().strip()
-                        score_label = score_elem.get_attribute("data-label") or ""
-                        # Có thể parse từ text hoặc từ data attributes
-                        if "overall" in score_label.lower() or "overall" in score_text.lower():
-                            scores["overall_score"] = score_text
-                        elif "style" in score_label.lower() or "style" in score_text.lower():
-                            scores["style_score"] = score_text
-                        elif "story" in score_label.lower() or "story" in score_text.lower():
-                            scores["story_score"] = score_text
-                        elif "grammar" in score_label.lower() or "grammar" in score_text.lower():
-                            scores["grammar_score"] = score_text
-                        elif "character" in score_label.lower() or "character" in score_text.lower():
-                            scores["character_score"] = score_text
-                    except:
-                        continue
-            except:
-                pass
+            # Mỗi score element được gán vào key đầu tiên khớp với label hoặc text
+            scores = EMPTY_REVIEW_SCORES.copy()
+            for score_text, score_label in fields["scores"]:
+                # 1 lần quét regex trên label + text, sau đó chọn key theo thứ tự ưu tiên
+                found = set(REVIEW_SCORE_KEY_RE.findall(f"{score_label}\n{score_text}".lower()))
+                if not found:
+                    continue
+                for key, field in REVIEW_SCORE_FIELDS:
+                    if key in found:
+                        scores[field] = score_text
+                        break
             
             # Tạo score_id từ scores (hash hoặc unique identifier)
             score_id = f"{review_id}_score" if review_id else ""
@@ -1861,13 +2931,8 @@ class RoyalRoadScraper:
                 )
             
             # Lưu user nếu có user_id
-            if user_id:
-                # Username có thể lấy từ review element nếu cần
-                username_elem = review_elem.locator("a[href*='/profile/'], .username, .reviewer-name, [class*='username']").first
-                if username_elem.count() > 0:
-                    username = username_elem.inner_text().strip()
-                    if username:
-                        self._save_user_to_mongo(user_id, username)
+            if user_id and username:
+                self._save_user_to_mongo(user_id, username)
             
             # Note: Review sẽ được lưu trong _scrape_reviews sau khi parse
             
@@ -1877,85 +2942,114 @@ class RoyalRoadScraper:
             safe_print(f"        ⚠️ Lỗi khi parse review: {e}")
             return None
 
+    def _flush_mongo_writers(self):
+        """
+        Ghi hết các buffer bulk_write (users, comments, reviews, scores) - cuối mỗi story.
+        Mỗi writer ghi 1 collection khác nhau nên flush song song.
+        """
+        if MONGODB_AVAILABLE:
+            flush_writers_parallel((self.user_writer, self.comment_writer, self.review_writer, self.score_writer))
+
     def _save_comment_to_mongo(self, comment_data):
-        """Lưu comment vào MongoDB ngay khi cào xong"""
-        if not comment_data or not self.mongo_collection_comments:
+        """
+        Lưu comment vào MongoDB khi cào xong
+        Không ghi ngay: thêm upsert vào buffer của self.comment_writer, ghi bằng bulk_write
+        (ordered=False) khi đủ COMMENT_WRITE_BATCH_SIZE comments, cuối mỗi story và khi stop()
+        """
+        if not comment_data or self.comment_writer is None:
             return
         
         try:
-            existing = self.mongo_collection_comments.find_one({"comment_id": comment_data.get("comment_id")})
-            if existing:
-                self.mongo_collection_comments.update_one(
-                    {"comment_id": comment_data.get("comment_id")},
-                    {"$set": comment_data}
-                )
-            else:
-                self.mongo_collection_comments.insert_one(comment_data)
+            self.comment_writer.add_update({"comment_id": comment_data.get("comment_id")}, comment_data)
         except Exception as e:
             safe_print(f"        ⚠️ Lỗi khi lưu comment vào MongoDB: {e}")
     
     def _save_chapter_to_mongo(self, chapter_data):
         """Lưu chapter vào MongoDB ngay khi cào xong chapter và comments"""
-        if not chapter_data or not self.mongo_collection_chapters:
+        if not chapter_data or self.mongo_collection_chapters is None:
             return
         
         try:
-            existing = self.mongo_collection_chapters.find_one({"id": chapter_data.get("id")})
-            if existing:
-                self.mongo_collection_chapters.update_one(
-                    {"id": chapter_data.get("id")},
-                    {"$set": chapter_data}
-                )
-                safe_print(f"      🔄 Đã cập nhật chapter {chapter_data.get('id')} trong MongoDB")
+            # Upsert: 1 round trip thay vì find_one rồi insert_one/update_one
+            result = self.mongo_collection_chapters.update_one(
+                {"id": chapter_data.get("id")},
+                {"$set": chapter_data},
+                upsert=True
+            )
+            if result.upserted_id is None:
+                debug_print("      🔄 Đã cập nhật chapter %s trong MongoDB", chapter_data.get('id'))
             else:
-                self.mongo_collection_chapters.insert_one(chapter_data)
-                safe_print(f"      ✅ Đã lưu chapter {chapter_data.get('id')} vào MongoDB")
+                debug_print("      ✅ Đã lưu chapter %s vào MongoDB", chapter_data.get('id'))
         except Exception as e:
             safe_print(f"      ⚠️ Lỗi khi lưu chapter vào MongoDB: {e}")
     
     def _save_review_to_mongo(self, review_data):
-        """Lưu review vào MongoDB ngay khi cào xong"""
-        if not review_data or not self.mongo_collection_reviews:
+        """Lưu review vào MongoDB khi cào xong (gom vào self.review_writer, ghi bằng bulk_write)"""
+        if not review_data or self.review_writer is None:
             return
         
         try:
-            existing = self.mongo_collection_reviews.find_one({"review_id": review_data.get("review_id")})
-            if existing:
-                self.mongo_collection_reviews.update_one(
-                    {"review_id": review_data.get("review_id")},
-                    {"$set": review_data}
-                )
-            else:
-                self.mongo_collection_reviews.insert_one(review_data)
+            self.review_writer.add_update({"review_id": review_data.get("review_id")}, review_data)
         except Exception as e:
             safe_print(f"        ⚠️ Lỗi khi lưu review vào MongoDB: {e}")
     
     def _save_user_to_mongo(self, user_id, username):
-        """Lưu user vào MongoDB ngay khi gặp user_id và username"""
-        if not user_id or not username or not self.mongo_collection_users:
+        """
+        Lưu user vào MongoDB khi gặp user_id và username
+        Không ghi ngay: thêm upsert vào buffer của self.user_writer, ghi bằng bulk_write
+        (ordered=False) khi đủ USER_WRITE_BATCH_SIZE users, cuối mỗi story và khi stop()
+        """
+        if not user_id or not username or self.user_writer is None:
             return
         
+        # User đã lưu (hoặc đang chờ ghi) với cùng username trong phiên này → bỏ qua
+        # (thường gặp: cùng 1 người comment nhiều lần). Chỉ khóa stripe chứa user_id này
+        user_cache, pending, user_cache_lock = self._user_cache_stripes[hash(user_id) % USER_CACHE_STRIPES]
+        with user_cache_lock:
+            if user_cache.get(user_id) == username:
+                user_cache.move_to_end(user_id)
+                return
+            if pending.get(user_id) == username:
+                return
+            pending[user_id] = username
+        
         try:
-            existing = self.mongo_collection_users.find_one({"user_id": user_id})
-            if existing:
-                # Update nếu username thay đổi
-                if existing.get("username") != username:
-                    self.mongo_collection_users.update_one(
-                        {"user_id": user_id},
-                        {"$set": {"username": username}}
-                    )
-            else:
-                user_data = {
+            self.user_writer.add_update(
+                {"user_id": user_id},
+                {
                     "user_id": user_id,  # Schema: user id
                     "username": username  # Schema: username
-                }
-                self.mongo_collection_users.insert_one(user_data)
+                },
+                tag=(user_id, username)
+            )
         except Exception as e:
+            with user_cache_lock:
+                pending.pop(user_id, None)
             safe_print(f"        ⚠️ Lỗi khi lưu user vào MongoDB: {e}")
     
+    def _on_users_written(self, tags, succeeded):
+        """
+        Callback on_written của user_writer: user chỉ vào cache sau khi bulk_write thành công,
+        batch lỗi thì bỏ khỏi pending để lần gặp sau được ghi lại
+        """
+        for user_id, username in tags:
+            user_cache, pending, user_cache_lock = self._user_cache_stripes[hash(user_id) % USER_CACHE_STRIPES]
+            with user_cache_lock:
+                if pending.get(user_id) == username:
+                    del pending[user_id]
+                if succeeded:
+                    user_cache[user_id] = username
+                    user_cache.move_to_end(user_id)
+                    if len(user_cache) > USER_CACHE_SIZE // USER_CACHE_STRIPES:
+                        user_cache.popitem(last=False)
+    
     def _save_score_to_mongo(self, score_id, overall_score, style_score, story_score, grammar_score, character_score):
-        """Lưu score vào MongoDB"""
-        if not score_id or not self.mongo_collection_scores:
+        """
+        Lưu score vào MongoDB (story score và score của từng review)
+        Không ghi ngay: thêm upsert vào buffer của self.score_writer, ghi bằng bulk_write
+        cùng lúc với comments/reviews thay vì 1 round trip update_one mỗi review
+        """
+        if not score_id or self.score_writer is None:
             return
         
         try:
@@ -1968,31 +3062,22 @@ class RoyalRoadScraper:
                 "character_score": character_score  # Schema: character score
             }
             
-            existing = self.mongo_collection_scores.find_one({"score_id": score_id})
-            if existing:
-                self.mongo_collection_scores.update_one(
-                    {"score_id": score_id},
-                    {"$set": score_data}
-                )
-            else:
-                self.mongo_collection_scores.insert_one(score_data)
+            self.score_writer.add_update({"score_id": score_id}, score_data)
         except Exception as e:
             safe_print(f"        ⚠️ Lỗi khi lưu score vào MongoDB: {e}")
     
     def _save_story_to_mongo(self, story_data):
         """Lưu story vào MongoDB (có thể update nhiều lần khi có thêm chapters/reviews)"""
-        if not story_data or not self.mongo_collection_stories:
+        if not story_data or self.mongo_collection_stories is None:
             return
         
         try:
-            existing = self.mongo_collection_stories.find_one({"id": story_data.get("id")})
-            if existing:
-                self.mongo_collection_stories.update_one(
-                    {"id": story_data.get("id")},
-                    {"$set": story_data}
-                )
-            else:
-                self.mongo_collection_stories.insert_one(story_data)
+            # Upsert: 1 round trip, không cần biết trước story đã có trong MongoDB hay chưa
+            self.mongo_collection_stories.update_one(
+                {"id": story_data.get("id")},
+                {"$set": story_data},
+                upsert=True
+            )
         except Exception as e:
             safe_print(f"⚠️ Lỗi khi lưu story vào MongoDB: {e}")
     
@@ -2003,12 +3088,25 @@ class RoyalRoadScraper:
         filename = f"{data['id']}_{utils.clean_text(data.get('name', data.get('title', 'unknown')))}.json"
         save_path = os.path.join(config.JSON_DIR, filename)
         
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        pretty = getattr(config, 'PRETTY_JSON', True)
+        if ORJSON_AVAILABLE:
+            # orjson trả về bytes UTF-8 (không escape unicode), chỉ hỗ trợ indent 2 space
+            # → nhánh json chuẩn cũng indent 2 để file giống nhau dù có orjson hay không
+            with open(save_path, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None))
+        else:
+            # json.dumps rồi ghi 1 lần: json.dump ghi từng mảnh nhỏ của iterencode vào file.
+            # Dữ liệu story là dict/list thuần (không tự tham chiếu) → bỏ check_circular
+            if pretty:
+                text = json.dumps(data, ensure_ascii=False, indent=2, check_circular=False)
+            else:
+                text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), check_circular=False)
+            with open(save_path, "w", encoding="utf-8") as f:
+                f.write(text)
         safe_print(f"💾 Đã lưu dữ liệu vào file: {save_path}")
         
         # 2. Lưu vào MongoDB (nếu được bật)
-        if self.mongo_collection:
+        if self.mongo_collection is not None:
             try:
                 # Kiểm tra xem đã có document với ID này chưa
                 existing = self.mongo_collection.find_one({"id": data['id']})
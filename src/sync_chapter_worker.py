@@ -5,11 +5,18 @@ Chỉ crawl lại chapter khi hash khác → cực nhanh và hiệu quả.
 """
 import time
 import sys
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from playwright.sync_api import sync_playwright
-from pymongo import MongoClient
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from pymongo import MongoClient, UpdateOne
 from src import config, utils
 
+# Chỉ đọc các field của chapter cần để so khớp (chapter_id/url) và so hash, không kéo content về
+CHAPTER_SYNC_PROJECTION = {
+    "id": 1, "fiction_url": 1,
+    "chapters.chapter_id": 1, "chapters.url": 1, "chapters.content_hash": 1,
+}
+
 # Helper function để print an toàn với encoding UTF-8
 def safe_print(*args, **kwargs):
     """Print function an toàn với encoding UTF-8 trên Windows"""
@@ -20,6 +27,50 @@ def safe_print(*args, **kwargs):
         message = message.encode('ascii', 'replace').decode('ascii')
         print(message, **kwargs)
 
+@dataclass(slots=True)
+class ChapterRef:
+    """
+    Metadata nhẹ của một chapter trong danh sách chapters (chưa có content).
+    Dùng __slots__ thay cho dict để tiết kiệm bộ nhớ với fiction có hàng nghìn chapters.
+    """
+    chapter_id: str
+    title: str
+    url: str
+
+@dataclass(slots=True)
+class ChapterBatch:
+    """
+    Danh sách chapters lưu dạng cột (các list song song) thay vì list các object.
+    Lọc/tra cứu theo một cột (vd: chapter_ids) chỉ cần duyệt 1 list liền mạch.
+    Iterate hoặc index 1 phần tử trả về ChapterRef; slice trả về ChapterBatch.
+    """
+    chapter_ids: list = field(default_factory=list)
+    titles: list = field(default_factory=list)
+    urls: list = field(default_factory=list)
+    
+    @classmethod
+    def from_columns(cls, urls, titles):
+        """Tạo batch từ 2 cột urls/titles, bỏ URL trùng (giữ thứ tự xuất hiện đầu tiên)"""
+        first_title = dict(zip(reversed(urls), reversed(titles)))
+        unique_urls = list(dict.fromkeys(urls))
+        return cls(
+            chapter_ids=[utils.extract_chapter_id(url) or None for url in unique_urls],
+            titles=[first_title[url] for url in unique_urls],
+            urls=unique_urls
+        )
+    
+    def __len__(self):
+        return len(self.urls)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChapterBatch(self.chapter_ids[index], self.titles[index], self.urls[index])
+        return ChapterRef(self.chapter_ids[index], self.titles[index], self.urls[index])
+    
+    def __iter__(self):
+        for chapter_id, title, url in zip(self.chapter_ids, self.titles, self.urls):
+            yield ChapterRef(chapter_id, title, url)
+
 class ChapterSyncWorker:
     """
     Worker để sync chapters đã crawl.
@@ -48,7 +99,7 @@ class ChapterSyncWorker:
     def start(self):
         """Khởi động trình duyệt"""
         self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS)
+        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS, args=getattr(config, 'BROWSER_LAUNCH_ARGS', None))
         self.page = self.browser.new_page()
         safe_print("✅ Chapter Sync Worker đã khởi động!")
     
@@ -68,55 +119,41 @@ class ChapterSyncWorker:
         Rất nhẹ, chỉ lấy: chapter_id, title, url, updated_at (nếu có).
         
         Returns:
-            list: Danh sách chapter metadata
+            ChapterBatch: Danh sách chapters dạng cột (iterate ra ChapterRef)
         """
         try:
             self.page.goto(fiction_url, timeout=config.TIMEOUT)
-            time.sleep(2)
-            
-            # Lấy chapters từ trang đầu tiên
-            chapter_urls = []
-            chapter_rows = self.page.locator("table#chapters tbody tr").all()
+            # Đợi bảng chapters có trong DOM thay vì sleep cố định
+            try:
+                self.page.wait_for_selector("table#chapters tbody tr", state="attached", timeout=10000)
+            except PlaywrightTimeoutError:
+                pass
             
-            for row in chapter_rows:
-                try:
-                    link_el = row.locator("td").first.locator("a")
-                    if link_el.count() > 0:
-                        url = link_el.get_attribute("href")
-                        title = link_el.inner_text()
-                        if url:
-                            if url.startswith("/"):
-                                full_url = config.BASE_URL + url
-                            elif url.startswith("http"):
-                                full_url = url
-                            else:
-                                full_url = config.BASE_URL + "/" + url
-                            
-                            # Extract chapter_id từ URL
-                            chapter_id = None
-                            try:
-                                url_parts = full_url.split("/chapter/")
-                                if len(url_parts) > 1:
-                                    chapter_id = url_parts[1].split("/")[0]
-                            except:
-                                pass
-                            
-                            chapter_urls.append({
-                                "chapter_id": chapter_id,
-                                "title": title,
-                                "url": full_url
-                            })
-                except:
-                    continue
+            # Lấy chapters từ trang đầu tiên - đọc 2 cột urls/titles trong 1 lần evaluate
+            columns = self.page.evaluate(
+                """baseUrl => {
+                    const urls = [], titles = [];
+                    for (const row of document.querySelectorAll('table#chapters tbody tr')) {
+                        const a = row.querySelector('td:first-child a');
+                        if (a && a.getAttribute('href')) {
+                            urls.push(new URL(a.getAttribute('href'), baseUrl + '/').href);
+                            titles.push(a.innerText);
+                        }
+                    }
+                    return {urls, titles};
+                }""",
+                config.BASE_URL
+            )
+            chapter_batch = ChapterBatch.from_columns(columns["urls"], columns["titles"])
             
             # TODO: Có thể mở rộng để lấy từ pagination nếu cần
             # Nhưng để đơn giản, chỉ lấy từ trang đầu tiên
             
-            return chapter_urls
+            return chapter_batch
             
         except Exception as e:
             safe_print(f"      ⚠️ Lỗi khi fetch chapter list: {e}")
-            return []
+            return ChapterBatch()
     
     def fetch_chapter_content(self, chapter_url):
         """
@@ -128,20 +165,17 @@ class ChapterSyncWorker:
         try:
             self.page.goto(chapter_url, timeout=config.TIMEOUT)
             self.page.wait_for_selector(".chapter-inner", timeout=10000)
-            time.sleep(1)
             
             title = self.page.locator("h1").first.inner_text()
             
             # Lấy content
             content = ""
             try:
-                from src.scraper_engine import RoyalRoadScraper
-                # Tạo instance tạm để dùng hàm helper
-                temp_scraper = RoyalRoadScraper()
+                from src.scraper_engine import convert_html_to_formatted_text
                 content_container = self.page.locator(".chapter-inner").first
                 if content_container.count() > 0:
                     html_content = content_container.inner_html()
-                    content = temp_scraper._convert_html_to_formatted_text(html_content)
+                    content = convert_html_to_formatted_text(html_content)
                 else:
                     content = self.page.locator(".chapter-inner").inner_text()
             except Exception as e:
@@ -149,13 +183,7 @@ class ChapterSyncWorker:
                 content = self.page.locator(".chapter-inner").inner_text()
             
             # Extract chapter_id
-            chapter_id = None
-            try:
-                url_parts = chapter_url.split("/chapter/")
-                if len(url_parts) > 1:
-                    chapter_id = url_parts[1].split("/")[0]
-            except:
-                pass
+            chapter_id = utils.extract_chapter_id(chapter_url) or None
             
             # Tính hash
             content_hash = utils.hash_content(content)
@@ -222,7 +250,7 @@ class ChapterSyncWorker:
             safe_print(f"      ❌ Lỗi khi sync chapter: {e}")
             return None
     
-    def sync_fiction_chapters(self, fiction_id, fiction_url, max_chapters=20):
+    def sync_fiction_chapters(self, fiction_id, fiction_url, max_chapters=20, fiction=None):
         """
         Sync chapters của một fiction.
         Chỉ sync những chapter có khả năng thay đổi (dựa trên metadata hoặc random check).
@@ -231,14 +259,16 @@ class ChapterSyncWorker:
             fiction_id: ID của fiction
             fiction_url: URL của fiction
             max_chapters: Số lượng chapter tối đa để sync mỗi lần
+            fiction: Document fiction đã đọc sẵn (projection CHAPTER_SYNC_PROJECTION), None = tự find_one
         """
-        if not self.mongo_collection:
+        if self.mongo_collection is None:
             safe_print("❌ Không có kết nối MongoDB")
             return
         
         try:
-            # Lấy fiction từ DB
-            fiction = self.mongo_collection.find_one({"id": fiction_id})
+            # Lấy fiction từ DB (sync_batch đã đọc sẵn thì không query lại)
+            if fiction is None:
+                fiction = self.mongo_collection.find_one({"id": fiction_id}, CHAPTER_SYNC_PROJECTION)
             if not fiction:
                 safe_print(f"      ⚠️ Fiction {fiction_id} không tồn tại trong DB")
                 return
@@ -271,8 +301,8 @@ class ChapterSyncWorker:
             unchanged_chapters = []
             
             for chapter_meta in chapters_to_sync:
-                chapter_url = chapter_meta["url"]
-                chapter_id = chapter_meta.get("chapter_id")
+                chapter_url = chapter_meta.url
+                chapter_id = chapter_meta.chapter_id
                 
                 # Tìm chapter trong DB
                 chapter_from_db = None
@@ -288,54 +318,42 @@ class ChapterSyncWorker:
                     if not chapter_from_db:
                         new_chapters.append(synced_chapter)
                     elif synced_chapter.get("content_hash") != chapter_from_db.get("content_hash"):
-                        updated_chapters.append(synced_chapter)
+                        # Giữ cả bản cũ để xác định đúng phần tử cần thay trong mảng chapters
+                        updated_chapters.append((chapter_from_db, synced_chapter))
                     else:
                         unchanged_chapters.append(synced_chapter)
                 
                 # Delay giữa các chapters
                 time.sleep(config.DELAY_BETWEEN_REQUESTS)
             
-            # Cập nhật DB
+            # Cập nhật DB: chỉ ghi các chapter thay đổi/mới thay vì $set lại toàn bộ mảng chapters
             if updated_chapters or new_chapters:
-                # Merge chapters: giữ chapters cũ, update/chèn chapters mới
-                all_chapters = list(chapters_from_db)
+                now = utils.get_current_timestamp()
+                ops = []
                 
-                # Update chapters đã thay đổi
-                for updated_chap in updated_chapters:
-                    updated_id = updated_chap.get("chapter_id") or updated_chap.get("url")
-                    found = False
-                    for i, old_chap in enumerate(all_chapters):
-                        old_id = old_chap.get("chapter_id") or old_chap.get("url")
-                        if old_id == updated_id:
-                            all_chapters[i] = updated_chap
-                            found = True
-                            break
-                    if not found:
-                        all_chapters.append(updated_chap)
+                # Chapter thay đổi: thay đúng phần tử trong mảng (arrayFilters theo chapter_id, fallback url)
+                for old_chap, updated_chap in updated_chapters:
+                    if old_chap.get("chapter_id"):
+                        array_filter = {"c.chapter_id": old_chap["chapter_id"]}
+                    else:
+                        array_filter = {"c.url": old_chap.get("url")}
+                    ops.append(UpdateOne(
+                        {"id": fiction_id},
+                        {"$set": {"chapters.$[c]": updated_chap, "updated_at": now}},
+                        array_filters=[array_filter]
+                    ))
                 
-                # Thêm chapters mới
+                # Chapter mới: append vào cuối mảng (bỏ trùng trong chính batch này)
+                new_by_id = {}
                 for new_chap in new_chapters:
-                    new_id = new_chap.get("chapter_id") or new_chap.get("url")
-                    # Kiểm tra xem đã có chưa
-                    exists = False
-                    for old_chap in all_chapters:
-                        old_id = old_chap.get("chapter_id") or old_chap.get("url")
-                        if old_id == new_id:
-                            exists = True
-                            break
-                    if not exists:
-                        all_chapters.append(new_chap)
+                    new_by_id.setdefault(new_chap.get("chapter_id") or new_chap.get("url"), new_chap)
+                if new_by_id:
+                    ops.append(UpdateOne(
+                        {"id": fiction_id},
+                        {"$push": {"chapters": {"$each": list(new_by_id.values())}}, "$set": {"updated_at": now}}
+                    ))
                 
-                # Cập nhật DB
-                self.mongo_collection.update_one(
-                    {"id": fiction_id},
-                    {
-                        "$set": {
-                            "chapters": all_chapters,
-                            "updated_at": utils.get_current_timestamp()
-                        }
-                    }
-                )
+                self.mongo_collection.bulk_write(ops, ordered=True)
                 
                 safe_print(f"      ✅ Đã cập nhật: {len(updated_chapters)} chapters thay đổi, {len(new_chapters)} chapters mới")
             else:
@@ -352,13 +370,14 @@ class ChapterSyncWorker:
             num_fictions: Số lượng fiction cần sync
             max_chapters_per_fiction: Số chapter tối đa sync mỗi fiction
         """
-        if not self.mongo_collection:
+        if self.mongo_collection is None:
             safe_print("❌ Không có kết nối MongoDB")
             return
         
         try:
-            # Lấy danh sách fiction
-            fictions = list(self.mongo_collection.find().limit(num_fictions))
+            # Lấy danh sách fiction kèm sẵn chapter_id/url/content_hash trong 1 query
+            # (không phải find_one lại từng fiction, không kéo content chapters về)
+            fictions = list(self.mongo_collection.find({}, CHAPTER_SYNC_PROJECTION).limit(num_fictions))
             
             if not fictions:
                 safe_print("📭 Không có fiction nào trong DB")
@@ -374,7 +393,7 @@ class ChapterSyncWorker:
                     fiction_url = f"{config.BASE_URL}/fiction/{fiction_id}"
                 
                 safe_print(f"\n📖 Đang sync Fiction {fiction_id}...")
-                self.sync_fiction_chapters(fiction_id, fiction_url, max_chapters_per_fiction)
+                self.sync_fiction_chapters(fiction_id, fiction_url, max_chapters_per_fiction, fiction=fiction)
                 
                 # Delay giữa các fiction
                 time.sleep(config.DELAY_BETWEEN_CHAPTERS * 2)
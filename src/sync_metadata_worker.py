@@ -6,10 +6,13 @@ Chạy background để cập nhật dữ liệu đã crawl trước đó mà kh
 import time
 import sys
 from datetime import datetime, timedelta
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from pymongo import MongoClient
 from src import config, utils
 
+# Chỉ đọc các field cần để sync metadata (không kéo chapters/reviews của fiction về)
+METADATA_SYNC_PROJECTION = {"id": 1, "fiction_url": 1, "metadata_hash": 1}
+
 # Helper function để print an toàn với encoding UTF-8
 def safe_print(*args, **kwargs):
     """Print function an toàn với encoding UTF-8 trên Windows"""
@@ -48,7 +51,7 @@ class MetadataSyncWorker:
     def start(self):
         """Khởi động trình duyệt"""
         self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS)
+        self.browser = self.playwright.chromium.launch(headless=config.HEADLESS, args=getattr(config, 'BROWSER_LAUNCH_ARGS', None))
         self.page = self.browser.new_page()
         safe_print("✅ Metadata Sync Worker đã khởi động!")
     
@@ -72,45 +75,29 @@ class MetadataSyncWorker:
         """
         try:
             self.page.goto(fiction_url, timeout=config.TIMEOUT)
-            time.sleep(2)
-            
-            # Lấy các metadata giống như scraper chính
-            title = self.page.locator("h1").first.inner_text()
-            author = self.page.locator(".fic-title h4 a").first.inner_text()
-            category = self.page.locator(".fiction-info span").first.inner_text()
-            status = self.page.locator(".fiction-info span:nth-child(2)").first.inner_text()
-            tags = self.page.locator(".tags a").all_inner_texts()
+            # Đợi tiêu đề fiction có trong DOM thay vì sleep cố định
+            try:
+                self.page.wait_for_selector(".fic-title", state="attached", timeout=10000)
+            except PlaywrightTimeoutError:
+                pass
+            
+            # Lấy các metadata giống như scraper chính - dùng chung 1 lần page.evaluate
+            from src.scraper_engine import STORY_METADATA_JS, build_story_stats, convert_html_to_formatted_text
+            metadata = self.page.evaluate(STORY_METADATA_JS)
+            title = metadata["title"]
+            author = metadata["author_name"]
+            category = metadata["category"]
+            status = metadata["status"]
+            tags = metadata["tags"]
             
             # Description
             description = ""
             try:
-                desc_container = self.page.locator(".description").first
-                if desc_container.count() > 0:
-                    html_content = desc_container.inner_html()
-                    # Sử dụng hàm từ scraper_engine
-                    from src.scraper_engine import RoyalRoadScraper
-                    # Tạo instance tạm để dùng hàm helper
-                    temp_scraper = RoyalRoadScraper()
-                    description = temp_scraper._convert_html_to_formatted_text(html_content)
+                if metadata["description_html"]:
+                    description = convert_html_to_formatted_text(metadata["description_html"])
             except Exception as e:
                 safe_print(f"      ⚠️ Lỗi khi lấy description: {e}")
             
-            # Stats
-            base_locator = ".stats-content ul.list-unstyled li:nth-child({}) span"
-            overall_score = self.page.locator(base_locator.format(2)).inner_text()
-            style_score = self.page.locator(base_locator.format(4)).inner_text()
-            story_score = self.page.locator(base_locator.format(6)).inner_text()
-            grammar_score = self.page.locator(base_locator.format(8)).inner_text()
-            character_score = self.page.locator(base_locator.format(10)).inner_text()
-            
-            stats_values_locator = self.page.locator("div.col-sm-6 li.font-red-sunglo")
-            total_views = stats_values_locator.nth(0).inner_text()
-            average_views = stats_values_locator.nth(1).inner_text()
-            followers = stats_values_locator.nth(2).inner_text()
-            favorites = stats_values_locator.nth(3).inner_text()
-            ratings = stats_values_locator.nth(4).inner_text()
-            pages = stats_values_locator.nth(5).inner_text()
-            
             # Tạo metadata dict
             metadata_dict = {
                 "title": title,
@@ -119,23 +106,7 @@ class MetadataSyncWorker:
                 "status": status,
                 "tags": sorted(tags) if tags else [],
                 "description": description,
-                "stats": {
-                    "score": {
-                        "overall_score": overall_score,
-                        "style_score": style_score,
-                        "story_score": story_score,
-                        "grammar_score": grammar_score,
-                        "character_score": character_score,
-                    },
-                    "views": {
-                        "total_views": total_views,
-                        "average_views": average_views,
-                        "followers": followers,
-                        "favorites": favorites,
-                        "ratings": ratings,
-                        "page_views": pages,
-                    }
-                }
+                "stats": build_story_stats(metadata)
             }
             
             return metadata_dict
@@ -144,16 +115,18 @@ class MetadataSyncWorker:
             safe_print(f"      ⚠️ Lỗi khi fetch metadata: {e}")
             return None
     
-    def sync_fiction_metadata(self, fiction_id, fiction_url):
+    def sync_fiction_metadata(self, fiction_id, fiction_url, existing=None):
         """
         Sync metadata của một fiction.
+        existing: Document fiction đã đọc sẵn (projection METADATA_SYNC_PROJECTION), None = tự find_one
         
         Returns:
             bool: True nếu có thay đổi và đã update, False nếu không thay đổi
         """
         try:
-            # Lấy fiction từ DB
-            existing = self.mongo_collection.find_one({"id": fiction_id})
+            # Lấy fiction từ DB (sync_batch đã đọc sẵn thì không query lại)
+            if existing is None:
+                existing = self.mongo_collection.find_one({"id": fiction_id}, METADATA_SYNC_PROJECTION)
             if not existing:
                 safe_print(f"      ⚠️ Fiction {fiction_id} không tồn tại trong DB")
                 return False
@@ -216,7 +189,7 @@ class MetadataSyncWorker:
             num_fictions: Số lượng fiction cần sync
             max_age_hours: Chỉ sync fiction chưa sync trong X giờ
         """
-        if not self.mongo_collection:
+        if self.mongo_collection is None:
             safe_print("❌ Không có kết nối MongoDB")
             return
         
@@ -235,7 +208,8 @@ class MetadataSyncWorker:
                 ]
             }
             
-            fictions = list(self.mongo_collection.find(query).limit(num_fictions))
+            # 1 query lấy luôn metadata_hash của cả batch (không find_one lại từng fiction)
+            fictions = list(self.mongo_collection.find(query, METADATA_SYNC_PROJECTION).limit(num_fictions))
             
             if not fictions:
                 safe_print("📭 Không có fiction nào cần sync metadata")
@@ -252,7 +226,7 @@ class MetadataSyncWorker:
                     # Tạo URL từ ID
                     fiction_url = f"{config.BASE_URL}/fiction/{fiction_id}"
                 
-                if self.sync_fiction_metadata(fiction_id, fiction_url):
+                if self.sync_fiction_metadata(fiction_id, fiction_url, existing=fiction):
                     updated_count += 1
                 
                 # Delay giữa các fiction
@@ -34,6 +34,42 @@ def download_image(image_url, fiction_id):
     
     return None
 
+# ========== URL UTILITIES ==========
+
+# Host quảng cáo/analytics/tracker bên thứ 3: chặn mọi request tới đó (kể cả script/xhr), dùng chung cho
+# scraper_engine và performance_optimizer → ít request, ít JS phải chạy.
+# Tuple để so bằng 1 lần str.endswith (khớp cả subdomain)
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com",
+    "googleadservices.com", "doubleclick.net", "adservice.google.com",
+    "facebook.net", "connect.facebook.com", "amazon-adsystem.com",
+    "scorecardresearch.com", "quantserve.com", "quantcount.com",
+    "pubmatic.com", "rubiconproject.com", "adnxs.com", "criteo.com", "criteo.net",
+    "hotjar.com", "cloudflareinsights.com",
+)
+
+def extract_path_id(url, marker):
+    """
+    Lấy đoạn path ngay sau marker (vd: marker "/chapter/": ".../chapter/123/abc" -> "123").
+    Dùng find + slice thay vì split() để không tạo list trung gian. Không có marker → "".
+    """
+    if not url:
+        return ""
+    i = url.find(marker)
+    if i < 0:
+        return ""
+    j = i + len(marker)
+    k = url.find("/", j)
+    return url[j:k] if k >= 0 else url[j:]
+
+def extract_chapter_id(url):
+    """ID chapter từ URL/href dạng /fiction/{id}/{slug}/chapter/{chapter_id}/{slug}"""
+    return extract_path_id(url, "/chapter/")
+
+def extract_fiction_id(url):
+    """ID fiction từ URL/href dạng /fiction/{id}/{slug}"""
+    return extract_path_id(url, "/fiction/")
+
 # ========== HASH UTILITIES ==========
 
 def sha256_hash(text):
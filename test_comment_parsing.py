@@ -0,0 +1,54 @@
+"""
+Test parse comments bằng lxml (_parse_comments_from_html)
+Không cần browser hay MongoDB: chỉ parse HTML tĩnh
+"""
+import pytest
+
+from src import config
+from src import scraper_engine
+
+COMMENT_HTML = """
+<div class="comment">
+  <div class="media media-v2" id="comment-container-111">
+    <div class="media-body">
+      <h4 class="media-heading"><span class="name"><a href="/profile/42/reader">Reader</a></span></h4>
+      <p>Dòng 1<br>Dòng 2<br/>Dòng 3</p>
+      <p>Đoạn 2</p>
+    </div>
+  </div>
+</div>
+"""
+
+COMMENT_NO_P_HTML = """
+<div class="comment">
+  <div class="media media-v2" id="comment-container-222">
+    <div class="media-body">Dòng A<br>Dòng B</div>
+  </div>
+</div>
+"""
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    """Scraper không kết nối MongoDB (_save_*_to_mongo tự bỏ qua khi không có writer)"""
+    if not scraper_engine.LXML_AVAILABLE:
+        pytest.skip("Cần lxml")
+    monkeypatch.setattr(config, "MONGODB_ENABLED", False)
+    return scraper_engine.RoyalRoadScraper()
+
+
+def test_comment_br_kept_as_newline(scraper):
+    """<br> trong <p> thành "\\n" giống inner_text của Playwright"""
+    comments = scraper._parse_comments_from_html(COMMENT_HTML, chapter_id="9")
+    assert len(comments) == 1
+    comment = comments[0]
+    assert comment["comment_id"] == "111"
+    assert comment["user_id"] == "42"
+    assert comment["comment_text"] == "Dòng 1\nDòng 2\nDòng 3\n\nĐoạn 2"
+
+
+def test_comment_br_without_paragraphs(scraper):
+    """Comment không có <p>: <br> vẫn tách dòng khi lấy text từ media-body"""
+    comments = scraper._parse_comments_from_html(COMMENT_NO_P_HTML, chapter_id="9")
+    assert len(comments) == 1
+    assert comments[0]["comment_text"] == "Dòng A\nDòng B"